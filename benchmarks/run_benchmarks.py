@@ -0,0 +1,196 @@
+# Times and memory-profiles every pipeline stage on synthetic data of growing size
+#
+#   python -m benchmarks.run_benchmarks --sizes 1000 100000 --output bench.json
+#   python -m benchmarks.run_benchmarks --baseline bench.json   # exits 1 on a regression
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import generate_noaa_csv
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ["load_data", "clean_data", "normalize_temperature", "fit", "custom_clustering",
+          "detect_anomalies", "plot_trend", "plot_clusters", "plot_anomalies"]
+
+
+def measure(fn: Callable[[], object], trace_memory: bool = True) -> Dict[str, float]:
+    """Run fn once and return its wall time and peak traced allocation"""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def bench_size(n_rows: int, work_dir: str, stages: List[str], trace_memory: bool = True) -> List[Dict[str, object]]:
+    """Benchmark the wanted stages on one synthetic file of n_rows rows"""
+    from src.data_processor import DataProcessor
+    from src.algorithms import custom_clustering, detect_anomalies
+    from src.predictor import CustomTemperaturePredictor
+    from src.visualizer import Visualizer
+
+    path = generate_noaa_csv(os.path.join(work_dir, f"synthetic_{n_rows}.csv"), n_rows)
+    processor = DataProcessor(path, "anomaly")
+    state = {}
+
+    def features():
+        """X / y for the algorithm stages, standardized the way the entry points do it"""
+        if "X" not in state:
+            X, y = processor.get_features_and_target()
+            state["X"] = (X - X.mean(axis=0)) / X.std(axis=0)
+            state["y"] = y
+        return state["X"], state["y"]
+
+    def fit():
+        X, y = features()
+        state["predictions"] = CustomTemperaturePredictor(solver="normal").fit(X, y).predict(X)
+
+    def cluster():
+        state["labels"] = custom_clustering(features()[0], n_clusters=3, random_state=0)
+
+    def anomalies():
+        state["anomalies"] = detect_anomalies(features()[1], window_size=3, threshold=1.5)
+
+    def plot_trend():
+        y = features()[1]
+        predictions = state.get("predictions", y)
+        Visualizer.plot_trend(np.arange(len(y)), y, predictions, show=False, output=io.BytesIO(), fmt="png")
+
+    def plot_clusters():
+        X = features()[0]
+        labels = state.get("labels", np.zeros(len(X), dtype=int))
+        Visualizer.plot_clusters(X, labels, show=False, output=io.BytesIO(), fmt="png")
+
+    def plot_anomalies():
+        y = features()[1]
+        flags = state.get("anomalies", np.zeros(len(y), dtype=bool))
+        Visualizer.plot_anomalies(y, flags, show=False, output=io.BytesIO(), fmt="png")
+
+    runners = {
+        "load_data": processor.load_data,
+        "clean_data": processor.clean_data,
+        "normalize_temperature": processor.normalize_temperature,
+        "fit": fit,
+        "custom_clustering": cluster,
+        "detect_anomalies": anomalies,
+        "plot_trend": plot_trend,
+        "plot_clusters": plot_clusters,
+        "plot_anomalies": plot_anomalies,
+    }
+
+    results = []
+    # The data stages always run because later stages depend on them
+    for stage in STAGES:
+        if stage not in stages and stage not in ("load_data", "clean_data", "normalize_temperature"):
+            continue
+        result = measure(runners[stage], trace_memory)
+        if stage in stages:
+            results.append({"stage": stage, "rows": n_rows, **result})
+    os.remove(path)
+    return results
+
+
+def run(sizes: List[int], stages: List[str], trace_memory: bool = True) -> Dict[str, object]:
+    """Full benchmark report for all sizes"""
+    work_dir = tempfile.mkdtemp(prefix="climate-bench-")
+    try:
+        results = []
+        for n_rows in sizes:
+            print(f" Benchmarking {n_rows} rows", file=sys.stderr)
+            # Keep the library's own progress prints out of the report
+            with _quiet():
+                results.extend(bench_size(n_rows, work_dir, stages, trace_memory))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "trace_memory": trace_memory,
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, object], baseline: Dict[str, object], tolerance: float = 0.25) -> List[Dict[str, object]]:
+    """Stage/size pairs slower (or hungrier) than the baseline by more than tolerance"""
+    previous = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["stage"], result["rows"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append({
+                    "stage": result["stage"],
+                    "rows": result["rows"],
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": result[metric],
+                    "ratio": result[metric] / old[metric],
+                })
+    return regressions
+
+
+class _quiet:
+    """Context manager sending stdout to /dev/null"""
+    def __enter__(self):
+        self._stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout = self._stdout
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point, returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Climate analyzer benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to benchmark (up to 10_000_000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to report")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Compare against this stored report and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs the baseline (0.25 = 25%%)")
+    parser.add_argument("--no_memory", action="store_true", help="Skip tracemalloc (faster, timings only)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.stages, trace_memory=not args.no_memory)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f" Regression: {r['stage']} @ {r['rows']} rows {r['metric']} "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} (x{r['ratio']:.2f})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,501 @@
+import heapq
+import os
+
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from sklearn.base import BaseEstimator, RegressorMixin
-from typing import Tuple
-
-class CustomTemperaturePredictor(BaseEstimator, RegressorMixin):
-    """A temperature predictor for future treends"""
-    def __init__(self, learning_rate: float = 0.01, n_iterations: int = 1000):
-        """Initializes the predictor with rate and iterations"""
-        self.learning_rate = learning_rate
-        self.n_iterations = n_iterations
-        self.weights = None  # will be inited later
-        self.bias = None     
-
-    def fit(self, X: np.ndarray, y: np.ndarray) -> 'CustomTemperaturePredictor':
-        '''Check for any NaN values on x and y'''
-        if np.isnan(X).any() or np.isnan(y).any():
-            print("NaN detected in input data so skipping training..")
-            return self
-    
-        n_samples, n_features = X.shape
-        # Init weights and bias to zeros 
-        self.weights = np.zeros(n_features)
-        self.bias = 0
-
-        for _ in range(self.n_iterations):
-            y_predicted = np.dot(X, self.weights) + self.bias
-            dw = (1 / n_samples) * np.dot(X.T, (y_predicted - y))
-            db = (1 / n_samples) * np.sum(y_predicted - y)
-
-            # Update our parameters
-            self.weights -= self.learning_rate * dw
-            self.bias -= self.learning_rate * db
+from typing import Optional, Sequence, Tuple, Union
+
+# The predictor pulls in scikit-learn, so it lives in src.predictor and is only
+# imported when somebody actually asks for it
+_PREDICTOR_NAMES = {"CustomTemperaturePredictor", "fit_batched"}
+
+
+def __getattr__(name):
+    """Lazy access to the predictor names (PEP 562) so importing this module stays cheap"""
+    if name in _PREDICTOR_NAMES:
+        from src import predictor
+        return getattr(predictor, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Restarts used by custom_clustering, one bad initial draw is outvoted by the others
+DEFAULT_N_INIT = 4
+
+class CustomKMeans:
+    """Memory bounded k-means with k-means++ seeding, tolerance stopping and an optional mini-batch mode
+
+    Distances are computed chunk by chunk as ||x||^2 - 2 x.c + ||c||^2 so the peak temporary
+    is chunk_size x n_clusters instead of samples x clusters x features.
+    """
+    def __init__(self, n_clusters: int = 3, max_iter: int = 300, tol: float = 1e-4,
+                 batch_size: Optional[int] = None, chunk_size: int = 4096,
+                 random_state: Optional[int] = None, n_init: int = 1, n_jobs: Optional[int] = 1):
+        """Initializes the clusterer, batch_size switches to mini-batch updates
 
+        n_init runs that many independently seeded restarts and keeps the one with the lowest
+        inertia. They run one after another unless n_jobs asks for threads (None: one per restart
+        up to the core count), leave it at 1 inside a worker pool. The seed of every restart is
+        spawned from random_state, so a fixed random_state gives the same result whatever n_jobs is.
+        """
+        self.n_clusters = n_clusters
+        self.max_iter = max_iter
+        self.tol = tol
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+        self.n_init = n_init
+        self.n_jobs = n_jobs
+        self.cluster_centers_ = None
+        self.labels_ = None
+        self.inertia_ = None
+        self.n_iter_ = 0
+        self.restart_inertias_ = None  # inertia of every restart in seed order
+        self.restart_n_iters_ = None
+
+    def fit(self, data: np.ndarray) -> 'CustomKMeans':
+        """Cluster the rows of data"""
+        data = _as_2d_float(data)
+        n_samples = data.shape[0]
+        if not 0 < self.n_clusters <= n_samples:
+            raise ValueError(f"n_clusters must be between 1 and the number of samples ({n_samples})")
+
+        if self.n_init < 1:
+            raise ValueError("n_init must be at least 1")
+
+        data_sq = np.einsum("ij,ij->i", data, data)
+        # Shift threshold is relative to the spread of the data like sklearn does
+        tol = self.tol * np.mean(np.var(data, axis=0))
+
+        if self.n_init == 1:
+            seeds = [self.random_state]
+        else:
+            # Independent child seeds, restart i always gets the same stream
+            seeds = np.random.SeedSequence(self.random_state).spawn(self.n_init)
+        n_jobs = min(self.n_init, self.n_jobs or os.cpu_count() or 1)
+        if n_jobs == 1:
+            runs = [self._run(data, data_sq, tol, seed) for seed in seeds]
+        else:
+            # Threads share the data without copies
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                runs = list(executor.map(lambda seed: self._run(data, data_sq, tol, seed), seeds))
+
+        # The first of equally good runs wins so the choice does not depend on timing
+        best = min(range(len(runs)), key=lambda i: runs[i][2])
+        self.cluster_centers_, self.labels_, self.inertia_, self.n_iter_ = runs[best]
+        self.restart_inertias_ = [run[2] for run in runs]
+        self.restart_n_iters_ = [run[3] for run in runs]
         return self
 
-    def predict(self, X: np.ndarray) -> np.ndarray:
-        """Predict values using the parameters."""
-        if self.weights is None or self.bias is None:
+    def _run(self, data: np.ndarray, data_sq: np.ndarray, tol: float, seed) -> Tuple[np.ndarray, np.ndarray, float, int]:
+        """One seeded restart, returns (centroids, labels, inertia, iterations)"""
+        rng = np.random.default_rng(seed)
+        centroids = self._init_centroids(data, data_sq, rng)
+        if self.batch_size is None:
+            centroids, n_iter = self._fit_full(data, data_sq, centroids, tol)
+        else:
+            centroids, n_iter = self._fit_minibatch(data, data_sq, centroids, tol, rng)
+        labels, min_dist = self._assign(data, data_sq, centroids)
+        return centroids, labels, float(min_dist.sum()), n_iter
+
+    def predict(self, data: np.ndarray) -> np.ndarray:
+        """Label new rows with the closest fitted centroid"""
+        if self.cluster_centers_ is None:
             raise ValueError("Model has not been trained yet so call fit() first.")
-        return np.dot(X, self.weights) + self.bias
+        data = _as_2d_float(data)
+        return self._assign(data, np.einsum("ij,ij->i", data, data), self.cluster_centers_)[0]
+
+    def _init_centroids(self, data: np.ndarray, data_sq: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """k-means++ seeding, each step only needs the distance to the newest centroid"""
+        n_samples = data.shape[0]
+        centroids = np.empty((self.n_clusters, data.shape[1]))
+        centroids[0] = data[rng.integers(n_samples)]
+        closest = self._sq_dist_to(data, data_sq, centroids[0])
+        for k in range(1, self.n_clusters):
+            total = closest.sum()
+            if total > 0:
+                idx = rng.choice(n_samples, p=closest / total)
+            else:
+                # Every point already sits on a centroid (duplicates) so any point will do
+                idx = rng.integers(n_samples)
+            centroids[k] = data[idx]
+            np.minimum(closest, self._sq_dist_to(data, data_sq, centroids[k]), out=closest)
+        return centroids
+
+    def _fit_full(self, data: np.ndarray, data_sq: np.ndarray, centroids: np.ndarray,
+                  tol: float) -> Tuple[np.ndarray, int]:
+        """Classic Lloyd iterations until the centroids stop moving, returns (centroids, iterations)"""
+        n_iter = 0
+        for i in range(self.max_iter):
+            labels, min_dist = self._assign(data, data_sq, centroids)
+            new_centroids = self._update(data, labels, min_dist, centroids)
+            shift = np.sum((new_centroids - centroids) ** 2)
+            centroids = new_centroids
+            n_iter = i + 1
+            if shift <= tol:
+                break
+        return centroids, n_iter
 
+    def _fit_minibatch(self, data: np.ndarray, data_sq: np.ndarray, centroids: np.ndarray,
+                       tol: float, rng: np.random.Generator) -> Tuple[np.ndarray, int]:
+        """Mini-batch updates with a per centroid learning rate of 1 / points seen, returns (centroids, iterations)"""
+        n_iter = 0
+        counts = np.zeros(self.n_clusters)
+        batch_size = min(self.batch_size, data.shape[0])
+        for i in range(self.max_iter):
+            idx = rng.choice(data.shape[0], batch_size, replace=False)
+            labels, _ = self._assign(data[idx], data_sq[idx], centroids)
+            batch_counts = np.bincount(labels, minlength=self.n_clusters)
+            sums = _sum_by_label(data[idx], labels, self.n_clusters)
 
-def custom_clustering(data: np.ndarray, n_clusters: int) -> np.ndarray:
-    """Simple k-means-like clustering and return the labels."""
-    # Randomly select initial centroids from data points
-    centroids = data[np.random.choice(data.shape[0], n_clusters, replace=False)]
-    for _ in range(10):  
-        
-        distances = np.linalg.norm(data[:, np.newaxis] - centroids, axis=2)
-        labels = np.argmin(distances, axis=1)
-        centroids = np.array([data[labels == k].mean(axis=0) for k in range(n_clusters)])
+            counts += batch_counts
+            seen = batch_counts > 0
+            new_centroids = centroids.copy()
+            # Moving average of everything this centroid has been assigned so far
+            new_centroids[seen] += (sums[seen] - batch_counts[seen, None] * centroids[seen]) / counts[seen, None]
+            shift = np.sum((new_centroids - centroids) ** 2)
+            centroids = new_centroids
+            n_iter = i + 1
+            if shift <= tol:
+                break
+        return centroids, n_iter
 
-    return labels
+    def _assign(self, data: np.ndarray, data_sq: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Closest centroid and its squared distance for every row, chunk by chunk"""
+        n_samples = data.shape[0]
+        labels = np.empty(n_samples, dtype=np.intp)
+        min_dist = np.empty(n_samples)
+        centroids_sq = np.einsum("ij,ij->i", centroids, centroids)
+        for start in range(0, n_samples, self.chunk_size):
+            stop = start + self.chunk_size
+            dist = data_sq[start:stop, None] - 2 * data[start:stop] @ centroids.T + centroids_sq
+            labels[start:stop] = np.argmin(dist, axis=1)
+            min_dist[start:stop] = dist[np.arange(len(dist)), labels[start:stop]]
+        # Rounding can leave tiny negatives
+        np.maximum(min_dist, 0, out=min_dist)
+        return labels, min_dist
 
+    def _sq_dist_to(self, data: np.ndarray, data_sq: np.ndarray, centroid: np.ndarray) -> np.ndarray:
+        """Squared distance of every row to one centroid"""
+        dist = data_sq - 2 * data @ centroid + centroid @ centroid
+        return np.maximum(dist, 0)
 
-def detect_anomalies(time_series: np.ndarray, window_size: int = 10, threshold: float = 2.0) -> np.ndarray:
-    """Detect anomalies using a moving average and threshold."""
+    def _update(self, data: np.ndarray, labels: np.ndarray, min_dist: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Mean of each cluster, empty clusters are moved to the points furthest from their centroid"""
+        counts = np.bincount(labels, minlength=self.n_clusters)
+        sums = _sum_by_label(data, labels, self.n_clusters)
+        new_centroids = centroids.copy()
+        filled = counts > 0
+        new_centroids[filled] = sums[filled] / counts[filled, None]
+
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            furthest = np.argsort(min_dist)[::-1][:len(empty)]
+            new_centroids[empty] = data[furthest]
+        return new_centroids
+
+
+def _as_2d_float(data: np.ndarray) -> np.ndarray:
+    """Clustering works on (samples, features) floats"""
+    data = np.asarray(data, dtype=float)
+    return data.reshape(-1, 1) if data.ndim == 1 else data
+
+
+def _sum_by_label(data: np.ndarray, labels: np.ndarray, n_clusters: int) -> np.ndarray:
+    """Per cluster sum of the rows without building a one-hot matrix"""
+    return np.stack([np.bincount(labels, weights=data[:, j], minlength=n_clusters)
+                     for j in range(data.shape[1])], axis=1)
+
+
+def custom_clustering(data: np.ndarray, n_clusters: int, n_init: int = DEFAULT_N_INIT, random_state: Optional[int] = 0,
+                      full_output: bool = False, **kwargs):
+    """Simple k-means-like clustering and return the labels, extra kwargs go to CustomKMeans.
+
+    Keeps the best of n_init seeded restarts so the same data always gets the same labels.
+    full_output returns (labels, centroids, inertia, iterations) of the best restart instead.
+    """
+    model = CustomKMeans(n_clusters=n_clusters, n_init=n_init, random_state=random_state, **kwargs).fit(data)
+    if full_output:
+        return model.labels_, model.cluster_centers_, model.inertia_, model.n_iter_
+    return model.labels_
+
+
+# Scales the median absolute deviation to the std of normally distributed data
+_MAD_TO_STD = 1.4826
+
+
+def detect_anomalies(time_series: np.ndarray, window_size: int = 10, threshold: float = 2.0,
+                     method: str = "mean") -> np.ndarray:
+    """Detect anomalies using a moving average and threshold.
+
+    method="median" is the robust mode: a rolling median instead of the moving average and the
+    scaled MAD of the series instead of the std, so the outliers do not skew what they are judged by.
+    """
+    if method == "median":
+        return _detect_anomalies_median(time_series, window_size, threshold)
+    if method != "mean":
+        raise ValueError(f"Unknown method '{method}', use 'mean' or 'median'")
     moving_avg = np.convolve(time_series, np.ones(window_size) / window_size, mode='valid') # Compute the moving average over window size
     padded_avg = np.pad(moving_avg, (window_size - 1, 0), mode='edge')
     # Flag anomalies 
     anomalies = np.abs(time_series - padded_avg) > threshold * np.std(time_series)
     return anomalies
 
+
+def _detect_anomalies_median(time_series: np.ndarray, window_size: int, threshold: float) -> np.ndarray:
+    """Robust mode of detect_anomalies, same mask layout (first window_size - 1 samples edge padded)"""
+    time_series = np.asarray(time_series, dtype=float)
+    if window_size < 1:
+        raise ValueError("window_size must be at least 1")
+    if len(time_series) < window_size:
+        # Not one full window, nothing can be judged
+        return np.zeros(len(time_series), dtype=bool)
+
+    medians = rolling_median(time_series, window_size)
+    residuals = np.abs(time_series - medians)
+    # Global spread of the series like np.std in the mean mode, but the outliers do not inflate it.
+    # The rolling residuals themselves would be far too small a scale, the window holds the sample.
+    deviations = np.abs(time_series - np.median(time_series))
+    scale = _MAD_TO_STD * np.median(deviations)
+    if scale == 0:
+        # Over half the samples share one value, the mean absolute deviation still sees the rest
+        scale = deviations.mean()
+    if scale == 0:
+        # A constant series has nothing to flag
+        return np.zeros(len(time_series), dtype=bool)
+    return residuals > threshold * scale
+
+
+def rolling_median(values: Sequence[float], window_size: int) -> np.ndarray:
+    """Median of the trailing window at every position in O(n log w), the first window_size - 1
+    positions get the first full window's median like the padding of detect_anomalies"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    medians = np.empty(n)
+    if n < window_size:
+        raise ValueError("The series is shorter than the window")
+    window = RollingMedian()
+    for i, value in enumerate(values.tolist()):
+        window.add(value)
+        if i >= window_size:
+            window.remove(values[i - window_size])
+        if i >= window_size - 1:
+            medians[i] = window.median()
+    medians[:window_size - 1] = medians[window_size - 1]
+    return medians
+
+
+class RollingMedian:
+    """Sliding window median with two heaps and lazy deletion, O(log w) per add / remove
+
+    The low heap (a max-heap of negated values) holds the smaller half, the high heap the larger
+    half. Removed values are only counted and dropped once they surface at the top of a heap.
+    """
+    def __init__(self):
+        """Initializes an empty window"""
+        self._low = []  # negated values, max-heap
+        self._high = []  # min-heap
+        self._low_size = 0  # live values in each heap, the heaps may also hold dead ones
+        self._high_size = 0
+        self._dead = defaultdict(int)  # value -> removals not yet dropped from a heap
+
+    def __len__(self) -> int:
+        """Number of values in the window"""
+        return self._low_size + self._high_size
+
+    def add(self, value: float) -> None:
+        """Put a value into the window"""
+        if not self._low or value <= -self._low[0]:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        self._rebalance()
+
+    def remove(self, value: float) -> None:
+        """Take a value that is in the window out of it"""
+        self._dead[value] += 1
+        if self._low and value <= -self._low[0]:
+            self._low_size -= 1
+            if value == -self._low[0]:
+                self._prune(self._low, negated=True)
+        else:
+            self._high_size -= 1
+            if self._high and value == self._high[0]:
+                self._prune(self._high, negated=False)
+        self._rebalance()
+
+    def median(self) -> float:
+        """Median of the window, the mean of the two middle values for an even count like np.median"""
+        if len(self) == 0:
+            raise ValueError("The window is empty")
+        if self._low_size > self._high_size:
+            return float(-self._low[0])
+        return (-self._low[0] + self._high[0]) / 2.0
+
+    def _rebalance(self) -> None:
+        """Keep the low half equal to or one larger than the high half"""
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, negated=True)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, negated=False)
+
+    def _prune(self, heap: list, negated: bool) -> None:
+        """Drop removed values sitting at the top of a heap"""
+        while heap:
+            value = -heap[0] if negated else heap[0]
+            if not self._dead.get(value):
+                break
+            self._dead[value] -= 1
+            if not self._dead[value]:
+                del self._dead[value]
+            heapq.heappop(heap)
+
+
+def detect_anomalies_grid(series: Union[np.ndarray, Sequence[Sequence[float]]], window_sizes: Sequence[int],
+                          thresholds: Sequence[float], packbits: bool = False) -> np.ndarray:
+    """detect_anomalies for many series and every window size / threshold pair in one call
+
+    series is a 1D series, an (..., samples) array or a list of series with different lengths.
+    Every moving average comes from one cumulative sum per series and the thresholds are
+    broadcast, so there is no Python loop over the grid. Returns a boolean array of shape
+    (..., windows, thresholds, samples) where [..., i, j, :] is the mask detect_anomalies gives
+    for window_sizes[i] / thresholds[j]. Positions past the end of a shorter series and series
+    shorter than the window are never flagged. packbits packs the last axis into uint8 bits
+    (np.unpackbits(result, axis=-1, count=samples) gives the mask back).
+    """
+    values, lengths = _stack_series(series)
+    lead_shape, n_samples = values.shape[:-1], values.shape[-1]
+    values = values.reshape(-1, n_samples)
+    lengths = lengths.reshape(-1)
+    windows = np.asarray(window_sizes, dtype=np.intp)
+    thresholds = np.asarray(thresholds, dtype=float)
+    if windows.ndim != 1 or thresholds.ndim != 1 or (windows < 1).any():
+        raise ValueError("window_sizes must be positive integers and thresholds a flat list")
+
+    valid = np.arange(n_samples) < lengths[:, None]
+    # Centering first keeps the cumulative sums small so the differences stay accurate
+    counts = np.maximum(lengths, 1)
+    means = np.where(valid, values, 0.0).sum(axis=1) / counts
+    centered = np.where(valid, values - means[:, None], 0.0)
+    std = np.sqrt((centered ** 2).sum(axis=1) / counts)
+
+    cumsum = np.zeros((len(values), n_samples + 1))
+    np.cumsum(centered, axis=1, out=cumsum[:, 1:])
+
+    # The first window_size - 1 positions reuse the first full window (edge padding)
+    ends = np.maximum(np.arange(n_samples), windows[:, None] - 1) + 1
+    ends = np.minimum(ends, n_samples)
+    # A window longer than the padded series would start before it, those rows are masked below
+    starts = np.maximum(ends - windows[:, None], 0)
+    moving_avg = (cumsum[:, ends] - cumsum[:, starts]) / windows[:, None]
+    deviation = np.abs(centered[:, None, :] - moving_avg)  # (series, windows, samples)
+
+    flags = deviation[:, :, None, :] > thresholds[None, None, :, None] * std[:, None, None, None]
+    usable = valid[:, None, :] & (windows[None, :, None] <= lengths[:, None, None])
+    flags &= usable[:, :, None, :]
+
+    flags = flags.reshape(lead_shape + flags.shape[1:])
+    return np.packbits(flags, axis=-1) if packbits else flags
+
+
+def _stack_series(series: Union[np.ndarray, Sequence[Sequence[float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(..., samples) float array plus the length of every series, ragged lists are zero padded"""
+    if isinstance(series, np.ndarray) or not len(series) or np.ndim(series[0]) == 0:
+        values = np.asarray(series, dtype=float)
+        return values, np.full(values.shape[:-1], values.shape[-1])
+    rows = [np.asarray(row, dtype=float).ravel() for row in series]
+    lengths = np.array([len(row) for row in rows])
+    values = np.zeros((len(rows), max(lengths.max(), 1)))
+    for i, row in enumerate(rows):
+        values[i, :len(row)] = row
+    return values, lengths
+
+
+class OnlineAnomalyDetector:
+    """Streaming version of detect_anomalies with O(1) work per new sample
+
+    Keeps a rolling window sum for the moving average and a running (Welford) variance for the
+    std. update()/extend() emit flags as soon as a sample can be judged, using the std seen so far.
+    anomalies() re-judges every sample against the final std, which is what detect_anomalies does
+    on the full series, so a full replay gives the same mask.
+    """
+    def __init__(self, window_size: int = 10, threshold: float = 2.0):
+        """Initializes the detector with the same window size and threshold as detect_anomalies"""
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        self.window_size = window_size
+        self.threshold = threshold
+        self._window = deque()
+        self._window_sum = 0.0
+        self._since_resum = 0
+        # Welford running mean / sum of squared deviations
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        # |value - moving average| per judged sample, grown by doubling
+        self._residuals = np.empty(64)
+        self._n_residuals = 0
+
+    @property
+    def std(self) -> float:
+        """Population std of everything seen so far like np.std"""
+        return float(np.sqrt(self._m2 / self.count)) if self.count else 0.0
+
+    def update(self, value: float) -> np.ndarray:
+        """Add one sample and return the flags that became known (empty until the first window fills)"""
+        value = float(value)
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+        self._window.append(value)
+        self._window_sum += value
+        if len(self._window) > self.window_size:
+            self._window_sum -= self._window.popleft()
+        self._since_resum += 1
+        if self._since_resum >= self.window_size:
+            # Re-add the window now and then so rounding errors cannot pile up
+            self._window_sum = sum(self._window)
+            self._since_resum = 0
+
+        if self.count < self.window_size:
+            return np.zeros(0, dtype=bool)
+
+        moving_avg = self._window_sum / self.window_size
+        if self.count == self.window_size:
+            # The first samples share the first full window's average (edge padding)
+            new = np.abs(np.array(self._window) - moving_avg)
+        else:
+            new = np.array([abs(value - moving_avg)])
+        self._store(new)
+        return new > self.threshold * self.std
+
+    def extend(self, values: Sequence[float]) -> np.ndarray:
+        """Add a chunk of samples and return all flags that became known"""
+        flags = [self.update(value) for value in values]
+        return np.concatenate(flags) if flags else np.zeros(0, dtype=bool)
+
+    def anomalies(self) -> np.ndarray:
+        """Flags for every judged sample against the current std, matches detect_anomalies on a replay"""
+        residuals = self._residuals[:self._n_residuals]
+        return residuals > self.threshold * self.std
+
+    def _store(self, new: np.ndarray) -> None:
+        """Append residuals, doubling the buffer when it is full"""
+        needed = self._n_residuals + len(new)
+        if needed > len(self._residuals):
+            grown = np.empty(max(needed, 2 * len(self._residuals)))
+            grown[:self._n_residuals] = self._residuals[:self._n_residuals]
+            self._residuals = grown
+        self._residuals[self._n_residuals:needed] = new
+        self._n_residuals = needed
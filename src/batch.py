@@ -0,0 +1,185 @@
+# Non-interactive batch runner over every CSV in data/, one worker process per file
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.cache import DatasetCache
+from src.data_processor import DataProcessor
+from src.algorithms import DEFAULT_N_INIT, custom_clustering, detect_anomalies
+from src.main import DATA_DIR, detect_target_column, list_data_files
+
+ACTIONS = ["predict", "cluster", "anomalies"]
+
+
+def analyze_file(rel_path: str, actions: List[str], n_clusters: int = 3,
+                 window_size: int = 3, threshold: float = 1.5, plot_dir: Optional[str] = None,
+                 plot_format: str = "png", anomaly_method: str = "mean",
+                 n_init: int = DEFAULT_N_INIT, cache_dir: Optional[str] = None) -> List[Dict[str, object]]:
+    """Load one data file once and run the wanted actions on it, returns one record per action
+
+    With plot_dir every action also writes its plot there headless, named <file>_<action>.<format>.
+    Parsed data is cached in cache_dir (default .data_cache).
+    """
+    filepath = os.path.join(DATA_DIR, rel_path)
+    cache = DatasetCache(cache_dir) if cache_dir else DatasetCache()
+
+    target_column = detect_target_column(rel_path)
+    if not target_column:
+        return [_record(rel_path, action, None, status="skipped", reason="no target column") for action in actions]
+
+    processor = DataProcessor(filepath, target_column, cache=cache)
+    processor.load_data()
+    processor.clean_data()
+    processor.normalize_temperature()
+    X, y = processor.get_features_and_target()
+    if X.size == 0 or y.size == 0:
+        return [_record(rel_path, action, target_column, status="skipped", reason="not enough data") for action in actions]
+
+    X_mean = X.mean(axis=0)
+    X_std = X.std(axis=0)
+    X = (X - X_mean) / X_std
+
+    records = []
+    for action in actions:
+        start = time.perf_counter()
+        record = _record(rel_path, action, target_column, n_samples=int(len(y)))
+        try:
+            if action == "predict":
+                from src.predictor import CustomTemperaturePredictor
+                model = CustomTemperaturePredictor(learning_rate=0.001, n_iterations=1000, solver="normal")
+                model.fit(X, y)
+                if model.weights is None:
+                    record.update(status="skipped", reason="training failed")
+                else:
+                    predictions = model.predict(X)
+                    plot_args = (list(range(len(y))), y, predictions)
+                    record.update(
+                        weights=model.weights.tolist(),
+                        bias=model.bias,
+                        rmse=float(np.sqrt(np.mean((predictions - y) ** 2))),
+                    )
+            elif action == "cluster":
+                # The files are already spread over the cores, so the restarts stay serial here
+                labels, centroids, inertia, n_iter = custom_clustering(X, n_clusters=n_clusters, n_init=n_init,
+                                                                       n_jobs=1, full_output=True)
+                record.update(
+                    cluster_sizes=np.bincount(labels, minlength=n_clusters).tolist(),
+                    centroids=centroids.tolist(),
+                    inertia=inertia,
+                    n_iter=n_iter,
+                )
+                plot_args = (X, labels)
+            elif action == "anomalies":
+                anomalies = detect_anomalies(y, window_size=window_size, threshold=threshold, method=anomaly_method)
+                record.update(
+                    n_anomalies=int(anomalies.sum()),
+                    anomaly_indices=np.flatnonzero(anomalies).tolist(),
+                )
+                plot_args = (y.tolist(), anomalies.tolist())
+            if plot_dir and record["status"] == "ok":
+                record["plot"] = _export_plot(plot_dir, plot_format, rel_path, action, plot_args)
+        except Exception as e:
+            record.update(status="error", reason=str(e))
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        records.append(record)
+    return records
+
+
+def _export_plot(plot_dir: str, plot_format: str, rel_path: str, action: str, plot_args: tuple) -> str:
+    """Draw the plot of one action straight to a file without a window"""
+    from src.visualizer import Visualizer
+
+    plotters = {
+        "predict": Visualizer.plot_trend,
+        "cluster": Visualizer.plot_clusters,
+        "anomalies": Visualizer.plot_anomalies,
+    }
+    os.makedirs(plot_dir, exist_ok=True)
+    stem = os.path.splitext(rel_path)[0].replace(os.sep, "_")
+    output = os.path.join(plot_dir, f"{stem}_{action}.{plot_format}")
+    plotters[action](*plot_args, show=False, output=output, fmt=plot_format)
+    return output
+
+
+def _record(rel_path: str, action: str, target_column: Optional[str], status: str = "ok", **fields) -> Dict[str, object]:
+    """Common fields of every output line"""
+    record = {"file": rel_path, "action": action, "target_column": target_column, "status": status}
+    record.update(fields)
+    return record
+
+
+def _analyze_task(task):
+    """Unpacks a task tuple so executor.map can call analyze_file"""
+    # Progress prints go to stderr so stdout stays clean JSON lines
+    with contextlib.redirect_stdout(sys.stderr):
+        return analyze_file(*task)
+
+
+def run_batch(files: List[str], actions: List[str], workers: Optional[int] = None, output=None,
+              n_clusters: int = 3, window_size: int = 3, threshold: float = 1.5,
+              plot_dir: Optional[str] = None, plot_format: str = "png", anomaly_method: str = "mean",
+              n_init: int = DEFAULT_N_INIT, cache_dir: Optional[str] = None) -> int:
+    """Run the actions over the files in a process pool and write JSON lines, returns how many records were written"""
+    output = output or sys.stdout
+    tasks = [(rel_path, actions, n_clusters, window_size, threshold, plot_dir, plot_format, anomaly_method, n_init, cache_dir)
+             for rel_path in files]
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps the input order while the files are processed in parallel
+        for records in executor.map(_analyze_task, tasks):
+            for record in records:
+                output.write(json.dumps(record) + "\n")
+                written += 1
+            output.flush()
+    return written
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for the batch subcommand"""
+    parser = argparse.ArgumentParser(prog="python -m src.cli batch",
+                                     description="Run analyses over every CSV in data/ in parallel")
+    parser.add_argument("--actions", nargs="+", choices=ACTIONS, default=ACTIONS, help="Actions to run on every file")
+    parser.add_argument("--folder", help="Only use files from this subfolder of data/")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    parser.add_argument("--n_clusters", type=int, default=3, help="Clusters for the cluster action")
+    parser.add_argument("--n_init", type=int, default=DEFAULT_N_INIT, help="Seeded k-means restarts, the lowest inertia wins")
+    parser.add_argument("--window_size", type=int, default=3, help="Window for the anomalies action")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Std multiplier for the anomalies action")
+    parser.add_argument("--anomaly_method", choices=["mean", "median"], default="mean",
+                        help="median uses the robust rolling median / MAD detector")
+    parser.add_argument("--plot_dir", help="Also write every plot into this directory (headless)")
+    parser.add_argument("--plot_format", choices=["png", "svg", "pdf"], default="png", help="Format of the exported plots")
+    parser.add_argument("--cache_dir", help="Directory of the parsed data cache (default: .data_cache)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of the batch subcommand"""
+    args = build_parser().parse_args(argv)
+
+    files = list_data_files()
+    if args.folder:
+        files = [f for f in files if f.split(os.sep)[0] == args.folder]
+    if not files:
+        print(" No data files found.", file=sys.stderr)
+        return
+
+    options = dict(n_clusters=args.n_clusters, window_size=args.window_size, threshold=args.threshold,
+                   plot_dir=args.plot_dir, plot_format=args.plot_format, anomaly_method=args.anomaly_method,
+                   n_init=args.n_init, cache_dir=args.cache_dir)
+    if args.output:
+        with open(args.output, "w") as f:
+            written = run_batch(files, args.actions, args.workers, f, **options)
+    else:
+        written = run_batch(files, args.actions, args.workers, None, **options)
+    print(f" Batch done: {written} results from {len(files)} files.", file=sys.stderr)
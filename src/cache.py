@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Optional, Tuple
+
+# The cache lives next to data/ at the project root
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".data_cache"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_fingerprint(file_path: str, with_hash: bool = False) -> Dict[str, object]:
+    """Return size / mtime (and optionally the sha1 of the content) of a file"""
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        fingerprint["sha1"] = content_hash(file_path)
+    return fingerprint
+
+
+def content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """sha1 of the file content read in blocks"""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_entry_name(name: str) -> bool:
+    """True for the sha1 named directories of cache entries"""
+    return len(name) == 40 and all(c in "0123456789abcdef" for c in name)
+
+
+class DatasetCache:
+    """On-disk columnar cache of parsed CSV files, one .npy per column plus a small manifest
+
+    The mtime of a manifest is the last access of its entry, a hit only bumps it instead of
+    rewriting the file.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initializes the cache directory and the size budget in bytes"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, file_path: str) -> str:
+        """Each source file gets a directory named after the hash of its absolute path"""
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _read_manifest(self, entry_dir: str) -> Optional[dict]:
+        """Load an entry manifest, None if it is missing or broken"""
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_NAME), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, entry_dir: str, manifest: dict) -> None:
+        """Write the manifest atomically so readers never see half a file"""
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(entry_dir, MANIFEST_NAME))
+
+    def _touch(self, entry_dir: str) -> None:
+        """Mark an entry as just used for the LRU eviction"""
+        now = time.time_ns()
+        try:
+            os.utime(os.path.join(entry_dir, MANIFEST_NAME), ns=(now, now))
+        except OSError:
+            pass
+
+    def _last_access(self, entry_dir: str) -> int:
+        """When an entry was last used, 0 if its manifest is gone"""
+        try:
+            return os.stat(os.path.join(entry_dir, MANIFEST_NAME)).st_mtime_ns
+        except OSError:
+            return 0
+
+    def get(self, file_path: str) -> Optional[Tuple[pd.DataFrame, dict]]:
+        """Return (DataFrame, metadata) if the cached copy still matches the source file"""
+        entry_dir = self._entry_dir(file_path)
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None:
+            return None
+
+        try:
+            current = file_fingerprint(file_path)
+        except OSError:
+            return None
+
+        cached = manifest["fingerprint"]
+        touched = False
+        if current["size"] != cached["size"]:
+            self.invalidate(file_path)
+            return None
+        if current["mtime_ns"] != cached["mtime_ns"]:
+            # Touched but maybe not changed, the content hash decides
+            if content_hash(file_path) != cached["sha1"]:
+                self.invalidate(file_path)
+                return None
+            # Remember the new mtime so later hits skip the hash
+            cached["mtime_ns"] = current["mtime_ns"]
+            touched = True
+
+        try:
+            columns = {
+                name: np.load(os.path.join(entry_dir, f"col_{i}.npy"), mmap_mode="r")
+                for i, name in enumerate(manifest["columns"])
+            }
+        except (OSError, ValueError):
+            self.invalidate(file_path)
+            return None
+
+        if touched:
+            try:
+                self._write_manifest(entry_dir, manifest)
+            except OSError:
+                pass
+        self._touch(entry_dir)
+        return pd.DataFrame(columns, columns=manifest["columns"]), manifest["metadata"]
+
+    def put(self, file_path: str, df: pd.DataFrame, metadata: Optional[dict] = None) -> bool:
+        """Store the parsed frame, only numeric columns can be cached"""
+        if df is None or df.empty:
+            return False
+        if not all(np.issubdtype(dtype, np.number) for dtype in df.dtypes):
+            return False
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fingerprint = file_fingerprint(file_path, with_hash=True)
+
+        # Build the entry in a temp dir and swap it in so concurrent readers stay safe
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            nbytes = 0
+            for i, name in enumerate(df.columns):
+                values = np.ascontiguousarray(df[name].to_numpy())
+                np.save(os.path.join(tmp_dir, f"col_{i}.npy"), values)
+                nbytes += values.nbytes
+            manifest = {
+                "source": os.path.abspath(file_path),
+                "fingerprint": fingerprint,
+                "columns": [str(col) for col in df.columns],
+                "metadata": metadata or {},
+                "nbytes": nbytes,
+            }
+            self._write_manifest(tmp_dir, manifest)
+
+            entry_dir = self._entry_dir(file_path)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            self._touch(entry_dir)
+        except OSError as e:
+            print(f"Could not cache {file_path}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        self.evict()
+        return True
+
+    def invalidate(self, file_path: str) -> None:
+        """Drop the cached copy of one source file"""
+        shutil.rmtree(self._entry_dir(file_path), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Drop every cached entry, other state in the same directory (models, catalog) is left alone"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if _is_entry_name(name) or name.startswith(".tmp-"):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def total_bytes(self) -> int:
+        """Size of all cached columns in bytes"""
+        return sum(manifest["nbytes"] for _, manifest in self._entries())
+
+    def _entries(self):
+        """Yield (entry_dir, manifest) for every complete entry"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if not _is_entry_name(name):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            manifest = self._read_manifest(entry_dir)
+            if manifest is not None:
+                yield entry_dir, manifest
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until we are under max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: self._last_access(entry[0]))
+        total = sum(manifest["nbytes"] for _, manifest in entries)
+        for entry_dir, manifest in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= manifest["nbytes"]
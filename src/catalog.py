@@ -0,0 +1,220 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.cache import DEFAULT_CACHE_DIR
+from src.data_processor import read_noaa_header
+
+# The index is a single JSON file next to the parse cache entries unless ANALYZER_CATALOG_INDEX points elsewhere
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "catalog.json")
+
+# Bump when the entry layout changes so old index files are rebuilt
+CATALOG_VERSION = 1
+
+
+def guess_target_column(filename: str, columns: Iterable[str]) -> Optional[str]:
+    """Guess the target column from the filename or, failing that, the column names"""
+    lower_name = filename.lower()
+
+    if "temp" in lower_name:
+        return "temperature"
+    elif "precip" in lower_name:
+        return "precipitation"
+    elif "anom" in lower_name:
+        return "anomaly"
+
+    # goes through the columns for common name
+    for col in columns:
+        if col in ["temperature", "precipitation", "anomaly"]:
+            return col
+        if "temp" in col.lower():
+            return col
+        if "precip" in col.lower():
+            return col
+        if "anom" in col.lower():
+            return col
+    return None
+
+
+class DataCatalog:
+    """Persistent index of the CSV files under a data directory
+
+    Every entry holds the preamble metadata (title, units, missing sentinel), the detected target
+    column, row count, year range and the size / mtime it was built from. refresh() only re-reads
+    files whose size or mtime changed and only walks the tree again when a directory changed, so
+    listing files and detecting targets are lookups instead of scans and parses.
+    """
+    def __init__(self, data_dir: str, index_path: Optional[str] = None, refresh_interval: float = 2.0):
+        """Initializes the catalog, refresh_interval is how many seconds a lookup trusts the last check
+
+        index_path defaults to $ANALYZER_CATALOG_INDEX or DEFAULT_INDEX_PATH.
+        """
+        self.data_dir = os.path.abspath(data_dir)
+        self.index_path = index_path or os.environ.get("ANALYZER_CATALOG_INDEX") or DEFAULT_INDEX_PATH
+        self.refresh_interval = refresh_interval
+        self._entries = None  # rel path -> entry, loaded lazily
+        self._dirs = {}  # rel dir -> mtime_ns when it was last walked
+        self._last_check = None
+        # _lock only guards swapping the dicts in and out, lookups never wait for a rescan.
+        # _scan_lock lets one thread at a time do the file system work.
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+
+    def files(self) -> List[str]:
+        """Sorted relative paths of all CSV files"""
+        self.refresh()
+        with self._lock:
+            return sorted(self._entries)
+
+    def get(self, rel_path: str) -> Optional[Dict[str, object]]:
+        """Entry of one file, None if it is not in the data directory"""
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(os.path.normpath(rel_path))
+            return dict(entry) if entry is not None else None
+
+    def target_column(self, rel_path: str) -> Optional[str]:
+        """Detected target column of one file"""
+        entry = self.get(rel_path)
+        return entry["target_column"] if entry is not None else None
+
+    def entries(self) -> List[Dict[str, object]]:
+        """Copies of all entries sorted by path"""
+        self.refresh()
+        with self._lock:
+            return [dict(self._entries[path]) for path in sorted(self._entries)]
+
+    def refresh(self, force: bool = False) -> bool:
+        """Bring the index up to date, returns True if anything changed
+
+        Lookups keep answering from the previous entries while the files are rescanned, only
+        the very first load makes them wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._entries is not None and self._last_check is not None
+                    and now - self._last_check < self.refresh_interval):
+                return False
+            self._last_check = now
+
+        with self._scan_lock:
+            if self._entries is None:
+                entries, dirs = self._load()
+            else:
+                with self._lock:
+                    entries, dirs = dict(self._entries), dict(self._dirs)
+
+            if force or self._dirs_changed(dirs):
+                paths, dirs = self._walk()
+            else:
+                paths = set(entries)
+
+            changed = False
+            for rel_path in set(entries) - paths:
+                del entries[rel_path]
+                changed = True
+            for rel_path in sorted(paths):
+                try:
+                    stat = os.stat(os.path.join(self.data_dir, rel_path))
+                except OSError:
+                    # Deleted since the walk
+                    changed |= entries.pop(rel_path, None) is not None
+                    continue
+                entry = entries.get(rel_path)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                entries[rel_path] = self._scan(rel_path, stat)
+                changed = True
+
+            # Entries are never changed once swapped in, readers only ever see whole dicts
+            with self._lock:
+                self._entries, self._dirs = entries, dirs
+            if changed or force:
+                self._save(entries, dirs)
+            return changed
+
+    def _dirs_changed(self, dirs: Dict[str, int]) -> bool:
+        """True when a walked directory was added to, removed from or deleted"""
+        if not dirs:
+            return True
+        for rel_dir, mtime_ns in dirs.items():
+            try:
+                if os.stat(os.path.join(self.data_dir, rel_dir)).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _walk(self) -> Tuple[set, Dict[str, int]]:
+        """Relative paths of every CSV file plus the directory mtimes to check next time"""
+        paths = set()
+        dirs = {}
+        for root, _, files in os.walk(self.data_dir):
+            dirs[os.path.relpath(root, self.data_dir)] = os.stat(root).st_mtime_ns
+            for file in files:
+                if file.endswith(".csv"):
+                    paths.add(os.path.relpath(os.path.join(root, file), self.data_dir))
+        return paths, dirs
+
+    def _scan(self, rel_path: str, stat: os.stat_result) -> Dict[str, object]:
+        """Read one file and build its entry"""
+        import pandas as pd
+
+        file_path = os.path.join(self.data_dir, rel_path)
+        entry = {
+            "path": rel_path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "title": None,
+            "units": None,
+            "missing": None,
+            "columns": [],
+            "target_column": None,
+            "rows": 0,
+            "year_min": None,
+            "year_max": None,
+        }
+        try:
+            metadata, n_header = read_noaa_header(file_path)
+            entry.update(title=metadata.get("title"), units=metadata.get("units"), missing=metadata.get("missing"))
+            df = pd.read_csv(file_path, skiprows=n_header, comment="#")
+        except Exception as e:
+            print(f"Could not index {file_path}: {e}")
+            entry["target_column"] = guess_target_column(rel_path, [])
+            return entry
+
+        columns = [str(col).strip().lower() for col in df.columns]
+        entry.update(columns=columns, target_column=guess_target_column(rel_path, columns), rows=len(df))
+        if "year" in columns and len(df):
+            years = pd.to_numeric(df.iloc[:, columns.index("year")], errors="coerce").dropna()
+            if len(years):
+                entry.update(year_min=int(years.min()), year_max=int(years.max()))
+        return entry
+
+    def _load(self) -> Tuple[Dict[str, Dict[str, object]], Dict[str, int]]:
+        """(entries, dirs) of the stored index, anything unreadable or built for another directory starts empty"""
+        try:
+            with open(self.index_path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        if stored.get("version") != CATALOG_VERSION or stored.get("data_dir") != self.data_dir:
+            return {}, {}
+        return stored.get("entries", {}), stored.get("dirs", {})
+
+    def _save(self, entries: Dict[str, Dict[str, object]], dirs: Dict[str, int]) -> None:
+        """Write the index atomically so other processes never read half a file"""
+        directory = os.path.dirname(self.index_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".catalog-", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": CATALOG_VERSION, "data_dir": self.data_dir,
+                           "dirs": dirs, "entries": entries}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save the data catalog: {e}")
@@ -3,42 +3,70 @@
 
 import argparse
 import os
+import sys
 
-import numpy as np
+from src.instrumentation import NULL_PROFILER, Profiler
 
-from src.data_processor import DataProcessor
-from src.algorithms import (
-    CustomTemperaturePredictor,
-    custom_clustering,
-    detect_anomalies
-)
-from src.visualizer import Visualizer
+# pandas, scikit-learn and matplotlib are imported inside main() once we know
+# which action runs, so --help and argument errors answer instantly
 
 
-
-def main():
+def main(argv=None):
     """Main CLI setsup our argument parser and run the script from the command line"""
-    parser = argparse.ArgumentParser(description="Climate Change Impact Analyzer CLI")
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        # python -m src.cli batch ... runs every file in data/ without any windows
+        from src.batch import main as batch_main
+        batch_main(argv[1:])
+        return
+    if argv and argv[0] == "tune":
+        # python -m src.cli tune ... cross-validates the predictor settings on every file
+        from src.tuning import main as tune_main
+        tune_main(argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(description="Climate Change Impact Analyzer CLI",
+                                     epilog="Use 'batch' as the first argument to run all data files in parallel (see 'batch --help'), "
+                                            "'tune' to search the predictor settings (see 'tune --help')")
     parser.add_argument("--folder", required=True, help="Subfolder inside data/ (e.g., 'precipitation' or 'temperature_anomaly')")
     parser.add_argument("--file", required=True, help="CSV filename inside the folder")
     parser.add_argument("--action", required=True, choices=["predict", "cluster", "anomalies"], help="Action to perform")
     parser.add_argument("--target_column", required=True, help="Name of the colomn to predict (e.g., 'temperature', 'precipitation', 'anomaly')")
+    parser.add_argument("--anomaly_method", choices=["mean", "median"], default="mean",
+                        help="median is the robust rolling median / MAD detector for the anomalies action")
+    parser.add_argument("--compact", action="store_true", help="float32 columns and in place normalization, uses a fraction of the memory")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing breakdown at the end")
+    parser.add_argument("--profile_memory", action="store_true", help="With --profile also track peak memory per stage (slower)")
+
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args()
+    profiler = Profiler(trace_memory=args.profile_memory) if args.profile else NULL_PROFILER
+    run(args, data_path=os.path.join("data", args.folder, args.file), profiler=profiler)
+    if args.profile:
+        print("\n Profile:")
+        print(profiler.format_report())
 
-    # Builds full path to the data file 
-    data_path = os.path.join("data", args.folder, args.file)
+
+def run(args, data_path, profiler=NULL_PROFILER):
+    """Runs the chosen action on one file, every stage is timed by the profiler"""
 
     if not os.path.exists(data_path):
         print(f" Error file not found at {data_path}")
         return
 
+    with profiler.span("import"):
+        from src.data_processor import DataProcessor
+
     # Load / preprocess data using DataProcessor
-    processor = DataProcessor(data_path, args.target_column)
-    df = processor.load_data()
-    df = processor.clean_data()
-    df = processor.normalize_temperature()  
-    X, y = processor.get_features_and_target()
+    processor = DataProcessor(data_path, args.target_column, compact=args.compact)
+    with profiler.span("load_data"):
+        df = processor.load_data()
+    with profiler.span("clean_data"):
+        df = processor.clean_data()
+    with profiler.span("normalize_temperature"):
+        df = processor.normalize_temperature()  
+    with profiler.span("get_features_and_target"):
+        X, y = processor.get_features_and_target()
 
     # Check if we have enough data to work with
     if X.size == 0 or y.size == 0:
@@ -46,34 +74,54 @@ def main():
         return
 
     # Normalize input features
-    X_mean = X.mean(axis=0)
-    X_std = X.std(axis=0)
-    X = (X - X_mean) / X_std
+    with profiler.span("standardize"):
+        X, X_mean, X_std = processor.standardize_features()
 
     if args.action == "predict":
-        model = CustomTemperaturePredictor(learning_rate=0.001, n_iterations=1000)
-        model.fit(X, y)
-        predictions = model.predict(X)
+        with profiler.span("import"):
+            from src.predictor import CustomTemperaturePredictor
+            from src.visualizer import Visualizer
+
+        with profiler.span("fit"):
+            model = CustomTemperaturePredictor(learning_rate=0.001, n_iterations=1000, solver="normal")
+            model.fit(X, y)
+        with profiler.span("predict"):
+            predictions = model.predict(X)
         # Show a few predictions vs actual values
         print("\nPredictions:", predictions[:5])
         print("Actual:     ", y[:5])
         # visualize the trend and animate 
-        Visualizer.plot_trend(list(range(len(y))), y, predictions)
-        Visualizer.animate_temperature_comparison(y.tolist(), predictions.tolist())
+        with profiler.span("render"):
+            Visualizer.plot_trend(list(range(len(y))), y, predictions)
+            Visualizer.animate_temperature_comparison(y.tolist(), predictions.tolist())
 
     elif args.action == "cluster":
+        with profiler.span("import"):
+            from src.algorithms import custom_clustering
+            from src.visualizer import Visualizer
+
         # Clustering data 
-        labels = custom_clustering(X, n_clusters=3)
+        with profiler.span("custom_clustering"):
+            labels, centroids, inertia, n_iter = custom_clustering(X, n_clusters=3, n_jobs=None,
+                                                                   full_output=True)
         print("\n Cluster Labels:", labels[:10])
+        print(f" Inertia: {inertia:.4f} after {n_iter} iterations, centroids:\n{centroids}")
         # Plot clusters 
-        Visualizer.plot_clusters(X, labels)
+        with profiler.span("render"):
+            Visualizer.plot_clusters(X, labels)
 
     elif args.action == "anomalies":
+        with profiler.span("import"):
+            from src.algorithms import detect_anomalies
+            from src.visualizer import Visualizer
+
         # detect anomalies 
-        anomalies = detect_anomalies(y, window_size=3, threshold=1.5)
+        with profiler.span("detect_anomalies"):
+            anomalies = detect_anomalies(y, window_size=3, threshold=1.5, method=args.anomaly_method)
         print("\n Anomalies (1 = anomaly):", anomalies.astype(int))
         # Plot anomalies 
-        Visualizer.plot_anomalies(y.tolist(), anomalies.tolist())
+        with profiler.span("render"):
+            Visualizer.plot_anomalies(y.tolist(), anomalies.tolist())
 
 
 if __name__ == "__main__":
@@ -1,28 +1,164 @@
 import pandas as pd
 import numpy as np
 
-from typing import Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from src.cache import DatasetCache
+
+# Columns that hold calendar values rather than measurements
+_INTEGER_COLUMNS = {"year", "month"}
+
+# Rows per chunk of the out-of-core mode
+DEFAULT_CHUNKSIZE = 100_000
+
+# The value NOAA exports use for missing data
+MISSING_SENTINEL = -9999
+
+
+def read_noaa_header(file_path: str) -> Tuple[Dict[str, Union[str, float]], int]:
+    """Read the '# Key: value' preamble of a NOAA export and return (metadata, number of preamble lines)"""
+    metadata = {}
+    n_lines = 0
+    with open(file_path, "r") as f:
+        for line in f:
+            if not line.startswith("#"):
+                break
+            n_lines += 1
+            key, sep, value = line.lstrip("#").partition(":")
+            if not sep:
+                continue
+            key = key.strip().lower().replace(" ", "_")
+            value = value.strip()
+            if key == "missing":
+                # The sentinel is numeric (e.g. -9999 or -999)
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass
+            metadata[key] = value
+    return metadata, n_lines
+
+
+class RunningStats:
+    """Streaming mean / variance per column (Welford), partial results merge like Chan et al.
+
+    Feeding a file chunk by chunk gives the same mean and std as computing them on the
+    whole column at once, without ever holding more than one chunk. With covariance=True the
+    full co-moment matrix is kept as well (m2 is its diagonal), enough for a least squares fit.
+    """
+    def __init__(self, n_columns: int = 1, covariance: bool = False):
+        """Initializes empty statistics for n_columns columns"""
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)  # sum of squared deviations from the mean
+        # Sum of outer products of the deviations, only with covariance=True
+        self.comoment = np.zeros((n_columns, n_columns)) if covariance else None
+
+    def update(self, values: np.ndarray) -> "RunningStats":
+        """Add a batch of rows (1D for a single column)"""
+        values = np.asarray(values, dtype=float).reshape(len(values), -1)
+        if len(values) == 0:
+            return self
+        other = RunningStats(values.shape[1], covariance=self.comoment is not None)
+        other.count = len(values)
+        other.mean = values.mean(axis=0)
+        centered = values - other.mean
+        if other.comoment is not None:
+            other.comoment = centered.T @ centered
+            other.m2 = np.diag(other.comoment).copy()
+        else:
+            other.m2 = (centered ** 2).sum(axis=0)
+        return self.merge(other)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold the statistics of another part of the data into these"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean.copy(), other.m2.copy()
+            if self.comoment is not None:
+                self.comoment = other.comoment.copy()
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / total
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / total
+        if self.comoment is not None:
+            self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.count * other.count / total
+        self.count = total
+        return self
+
+    def copy(self) -> "RunningStats":
+        """Independent copy"""
+        return RunningStats(len(self.mean), covariance=self.comoment is not None).merge(self)
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        """Standard deviation per column, ddof=1 like pandas"""
+        if self.count <= ddof:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.count - ddof))
+
+    def to_dict(self) -> Dict[str, object]:
+        """JSON friendly copy"""
+        return {"count": self.count, "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+                "comoment": self.comoment.tolist() if self.comoment is not None else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "RunningStats":
+        """Inverse of to_dict"""
+        stats = cls(len(data["mean"]), covariance=data.get("comoment") is not None)
+        stats.count = data["count"]
+        stats.mean = np.asarray(data["mean"], dtype=float)
+        stats.m2 = np.asarray(data["m2"], dtype=float)
+        if stats.comoment is not None:
+            stats.comoment = np.asarray(data["comoment"], dtype=float)
+        return stats
+
 
 class DataProcessor:
     """Process data from a CSV file to clean data and normalize techniques and create a module for data loading  and pre processing """
-    def __init__(self, file_path: str, target_column: str):
-        """Initializes data processor with the file and the target column in the data"""
+    def __init__(self, file_path: str, target_column: str, cache: Optional["DatasetCache"] = None,
+                 compact: bool = False):
+        """Initializes data processor with the file and the target column in the data, cache is an optional DatasetCache
+
+        compact parses year/month as int16 and measurements as float32, then clean_data packs the
+        valid rows into one float32 block that the DataFrame, X and y are all views of.
+        """
         self.file_path = file_path
         self.target_column = target_column
+        self.cache = cache
+        self.compact = compact
         self.df = None
+        self.values = None  # compact mode: (n_columns, n_rows) float32 block behind self.df
+        self.target_mean = None  # set by normalize_temperature
+        self.target_std = None
+        self.metadata = {}  # filled from the '# Title/Units/Missing/Base Period' preamble
 
     def load_data(self) -> pd.DataFrame:
         """Load data from CSV,this takes the normal data name and renames the target column -potential"""
         try:
             print(f" Loading data from: {self.file_path}")
-            self.df = pd.read_csv(
-                self.file_path,
-                engine="python",
-                comment="#",  
-            )
+            cached = self.cache.get(self.file_path) if self.cache is not None else None
+            if cached is not None:
+                # Unchanged since the last parse so skip the CSV entirely
+                self.df, self.metadata = cached
+            else:
+                try:
+                    self.df = self._read_fast()
+                except (ValueError, pd.errors.ParserError, UnicodeDecodeError):
+                    # Malformed file so fall back to the slow but forgiving python parser
+                    self.df = pd.read_csv(
+                        self.file_path,
+                        engine="python",
+                        comment="#",
+                    )
 
-            # Normalize column names
-            self.df.columns = [col.strip().lower() for col in self.df.columns]
+                # Normalize column names
+                self.df.columns = [col.strip().lower() for col in self.df.columns]
+                # Compact frames use other dtypes than the ones the cache hands back
+                if self.cache is not None and not self.compact:
+                    self.cache.put(self.file_path, self.df, self.metadata)
 
             # Rename standard data columns to match the wanted target colum
             if "value" in self.df.columns:
@@ -36,23 +172,177 @@ class DataProcessor:
             self.df = pd.DataFrame()
         return self.df
 
+    def _read_fast(self) -> pd.DataFrame:
+        """Parse the preamble once, skip it by line count and read the body with the C engine"""
+        n_header, dtypes = self._header_and_dtypes()
+        if self.compact:
+            # The parser works in float64 internally, chunks keep that scratch space small
+            with pd.read_csv(self.file_path, engine="c", skiprows=n_header, dtype=dtypes,
+                             chunksize=DEFAULT_CHUNKSIZE) as reader:
+                return pd.concat(list(reader), ignore_index=True)
+        return pd.read_csv(
+            self.file_path,
+            engine="c",
+            skiprows=n_header,
+            dtype=dtypes,
+        )
+
+    def _header_and_dtypes(self) -> Tuple[int, Dict[str, str]]:
+        """Read the preamble into self.metadata and return (preamble lines, dtype per column)"""
+        self.metadata, n_header = read_noaa_header(self.file_path)
+
+        # Peek at the column row so we can hand explicit dtypes to the parser
+        with open(self.file_path, "r") as f:
+            for _ in range(n_header):
+                next(f)
+            header = f.readline()
+        columns = [col.strip() for col in header.rstrip("\n").split(",")]
+        int_type, float_type = ("int16", "float32") if self.compact else ("int64", "float64")
+        dtypes = {
+            col: int_type if col.lower() in _INTEGER_COLUMNS else float_type
+            for col in columns if col
+        }
+        return n_header, dtypes
+
+    def iter_chunks(self, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """Read the CSV chunksize rows at a time, every chunk is cleaned and renamed like load_data + clean_data
+
+        Nothing is kept between chunks and the dataset cache is bypassed, so memory depends on
+        chunksize only.
+        """
+        n_header, dtypes = self._header_and_dtypes()
+        yielded = False
+        try:
+            with pd.read_csv(self.file_path, engine="c", skiprows=n_header, dtype=dtypes, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yielded = True
+                    yield self.clean_chunk(chunk)
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError):
+            if yielded:
+                raise
+            # Malformed file so fall back to the slow but forgiving python parser
+            with pd.read_csv(self.file_path, engine="python", comment="#", chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield self.clean_chunk(chunk)
+
+    def clean_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Column names, target rename and sentinel filtering for one raw chunk of the file"""
+        chunk.columns = [col.strip().lower() for col in chunk.columns]
+        if "value" in chunk.columns:
+            chunk = chunk.rename(columns={"value": self.target_column})
+        elif "anomaly" in chunk.columns:
+            chunk = chunk.rename(columns={"anomaly": self.target_column})
+        return chunk.replace(MISSING_SENTINEL, np.nan).dropna()
+
+    def compute_stats(self, chunksize: int = DEFAULT_CHUNKSIZE) -> Tuple[RunningStats, RunningStats]:
+        """One streaming pass over the file for the (feature, target) statistics of the clean rows"""
+        features = None
+        target = RunningStats(1)
+        for chunk in self.iter_chunks(chunksize):
+            if 'year' not in chunk.columns or self.target_column not in chunk.columns:
+                raise ValueError(f"Missing required columns; 'year' and '{self.target_column}'")
+            columns = self.feature_columns(chunk)
+            if features is None:
+                features = RunningStats(len(columns))
+            features.update(chunk[columns].to_numpy(dtype=float))
+            target.update(chunk[self.target_column].to_numpy(dtype=float))
+        return features if features is not None else RunningStats(0), target
+
+    def iter_features_and_target(self, chunksize: int = DEFAULT_CHUNKSIZE,
+                                 stats: Optional[Tuple[RunningStats, RunningStats]] = None,
+                                 standardize_features: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Out-of-core version of normalize_temperature + get_features_and_target
+
+        Yields (X, y) batches of at most chunksize clean rows with y normalized by the mean / std
+        of the whole file. The statistics come from a first streaming pass (compute_stats) unless
+        given and are kept on self.feature_stats / self.target_stats. standardize_features also
+        scales X the way the entry points do before fitting.
+        """
+        if stats is None:
+            stats = self.compute_stats(chunksize)
+        self.feature_stats, self.target_stats = stats
+        y_mean, y_std = self.target_stats.mean[0], self.target_stats.std()[0]
+        X_mean, X_std = self.feature_stats.mean, self.feature_stats.std(ddof=0)
+
+        for chunk in self.iter_chunks(chunksize):
+            if chunk.empty:
+                continue
+            X = chunk[self.feature_columns(chunk)].to_numpy()
+            if standardize_features:
+                X = (X - X_mean) / X_std
+            y = (chunk[self.target_column].to_numpy(dtype=float) - y_mean) / y_std
+            yield X, y
+
+    @staticmethod
+    def feature_columns(df: pd.DataFrame) -> List[str]:
+        """year and month when there is one"""
+        return ['year', 'month'] if 'month' in df.columns else ['year']
+
     def clean_data(self) -> pd.DataFrame:
         """Replace error and drop the missing values"""
         if self.df is not None and not self.df.empty:
-            self.df.replace(-9999, pd.NA, inplace=True)
+            if self.compact:
+                return self._clean_compact()
+            # np.nan keeps the columns numeric, pd.NA turned them into object columns
+            self.df.replace(MISSING_SENTINEL, np.nan, inplace=True)
             self.df.dropna(inplace=True)
         return self.df
 
+    def _clean_compact(self) -> pd.DataFrame:
+        """Drop sentinel / NaN rows with one boolean mask and pack the rest into the float32 block"""
+        columns = [col for col in self.df.columns if pd.api.types.is_numeric_dtype(self.df[col])]
+        valid = np.ones(len(self.df), dtype=bool)
+        for col in columns:
+            values = self.df[col].to_numpy()
+            valid &= values != MISSING_SENTINEL
+            if values.dtype.kind == "f":
+                valid &= ~np.isnan(values)
+
+        # One row per column so every column (and y) is contiguous
+        self.values = np.empty((len(columns), int(valid.sum())), dtype=np.float32)
+        for i, col in enumerate(columns):
+            self.values[i] = self.df[col].to_numpy()[valid]
+        self.df = pd.DataFrame(self.values.T, columns=columns, copy=False)
+        return self.df
+
     def normalize_temperature(self) -> pd.DataFrame:
         """Normalize the target column using the data values"""
         if self.target_column in self.df.columns:
+            if self.values is not None:
+                # Compact mode scales the row of the block in place, std with ddof=1 like pandas
+                y = self.values[self.df.columns.get_loc(self.target_column)]
+                mean, std = y.mean(dtype=np.float64), y.std(dtype=np.float64, ddof=1)
+                self.target_mean, self.target_std = float(mean), float(std)
+                y -= mean
+                y /= std
+                return self.df
+            # Kept so predictions can be turned back into the units of the file
+            self.target_mean = float(self.df[self.target_column].mean())
+            self.target_std = float(self.df[self.target_column].std())
             self.df[self.target_column] = (
-                self.df[self.target_column] - self.df[self.target_column].mean()
-            ) / self.df[self.target_column].std()
+                self.df[self.target_column] - self.target_mean
+            ) / self.target_std
         else:
             print(f"'{self.target_column}' column not found ; no normalization")
         return self.df
 
+    def standardize_features(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Scale year / month to zero mean and unit std like the entry points do, returns (X, mean, std)
+
+        In compact mode X is scaled in place inside the block, otherwise a new array is built.
+        """
+        X, _ = self.get_features_and_target()
+        if X.size == 0:
+            return X, np.array([]), np.array([])
+        mean = X.mean(axis=0, dtype=np.float64)
+        std = X.std(axis=0, dtype=np.float64)
+        if self.values is None:
+            return (X - mean) / std, mean, std
+        for i in range(X.shape[1]):
+            X[:, i] -= mean[i]
+            X[:, i] /= std[i]
+        return X, mean, std
+
     def get_features_and_target(self) -> Tuple[np.ndarray, np.ndarray]:
         """Extract features year/ month  and the target variable if missing, return the empty array"""
         if self.df is None or self.df.empty:
@@ -62,7 +352,16 @@ class DataProcessor:
             print(f"Missing required columns; 'year' and '{self.target_column}'")
             return np.array([]), np.array([])
 
-       
+        if self.values is not None:
+            # Compact mode hands out views of the block, nothing is copied
+            rows = [self.df.columns.get_loc(col) for col in self.feature_columns(self.df)]
+            if rows == list(range(rows[0], rows[0] + len(rows))):
+                X = self.values[rows[0]:rows[0] + len(rows)].T
+            else:
+                # year / month not next to each other in the file, only then X is a copy
+                X = self.values[rows].T
+            return X, self.values[self.df.columns.get_loc(self.target_column)]
+
         if 'month' in self.df.columns:
             X = self.df[['year', 'month']].values
         else:
@@ -0,0 +1,63 @@
+import numpy as np
+
+from typing import Optional, Sequence
+
+# Default number of points a plot draws per series, more than a screen can show
+DEFAULT_MAX_POINTS = 4000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of y(x)
+
+    The first and last points are always kept. Every bucket in between keeps the point that
+    makes the largest triangle with the point kept in the previous bucket and the mean of
+    the next bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+
+    # n - 2 inner points are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Mean of the following bucket (or the last point for the final bucket)
+        next_start = stop
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+
+        # Twice the triangle area for every candidate in this bucket at once
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def downsample_indices(y: Sequence[float], max_points: Optional[int] = DEFAULT_MAX_POINTS,
+                       keep: Optional[np.ndarray] = None, x: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Sorted indices to plot for a series within a point budget
+
+    keep is a boolean mask (e.g. the anomalies of detect_anomalies) whose points are always
+    kept on top of the budget. max_points=None or a short series keeps everything.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    x = np.arange(n) if x is None else np.asarray(x, dtype=float)
+
+    indices = lttb_indices(x, y, max_points)
+    if keep is not None:
+        indices = np.union1d(indices, np.flatnonzero(keep))
+    return indices
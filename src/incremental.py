@@ -0,0 +1,224 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Optional, Tuple
+
+from src.cache import DEFAULT_CACHE_DIR
+from src.data_processor import DataProcessor, RunningStats, read_noaa_header
+from src.predictor import CustomTemperaturePredictor, _MAX_CONDITION
+
+# Where the per file states live, next to the parse cache entries
+DEFAULT_STATE_DIR = os.path.join(DEFAULT_CACHE_DIR, "incremental")
+
+# Bytes parsed at a time, the first pass over a long file never holds more than this
+_BLOCK_BYTES = 16 * 1024 * 1024
+
+STATE_VERSION = 3
+
+
+def _least_squares(moments: RunningStats) -> Tuple[np.ndarray, float]:
+    """Weights and intercept of the last column regressed on the others, in raw units, from the co-moments alone"""
+    cxx = moments.comoment[:-1, :-1]
+    cxy = moments.comoment[:-1, -1]
+    if moments.count > 1 and np.linalg.cond(cxx) < _MAX_CONDITION:
+        beta = np.linalg.solve(cxx, cxy)
+    else:
+        # Constant feature or too few rows, the minimum norm answer like the solver does
+        beta = np.linalg.lstsq(cxx, cxy, rcond=None)[0]
+    return beta, float(moments.mean[-1] - moments.mean[:-1] @ beta)
+
+
+class IncrementalModel:
+    """Keeps the statistics and the linear model of one file up to date as rows are appended
+
+    The state (byte offset read so far, sha1 of the bytes before it, running moments of the clean
+    rows) is stored on disk. refresh() only parses the bytes after the offset, so a monthly append
+    costs O(new rows) of parsing plus one hashing pass over the old bytes. If the file shrank or
+    any byte before the offset changed (e.g. a revised historical value) the state is rebuilt
+    from scratch.
+    The model and stats match what the full pipeline gives: y normalized with ddof=1 like
+    normalize_temperature and X standardized with ddof=0 like the entry points.
+    """
+    def __init__(self, file_path: str, target_column: str, state_dir: str = DEFAULT_STATE_DIR):
+        """Initializes the tracker of one file / target pair and loads its stored state"""
+        self.file_path = file_path
+        self.target_column = target_column
+        self.state_dir = state_dir
+        self._processor = DataProcessor(file_path, target_column)
+        self.columns = None  # raw CSV column names
+        self.features = None  # feature column names after cleaning
+        self.offset = 0
+        self.prefix_sha1 = None  # sha1 of the bytes before offset
+        self.moments = None  # rows up to offset
+        self._pending = None  # a last line without newline, counted but not committed
+        self._load()
+
+    @property
+    def state_path(self) -> str:
+        """State file of this file / target pair"""
+        key = hashlib.sha1(f"{os.path.abspath(self.file_path)}::{self.target_column}".encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    @property
+    def count(self) -> int:
+        """Clean rows seen so far"""
+        return self._current().count if self.moments is not None else 0
+
+    def refresh(self) -> int:
+        """Read what was appended since the last refresh and return the number of new clean rows"""
+        hasher = self._prefix_hasher() if self.moments is not None else None
+        if hasher is None or hasher.hexdigest() != self.prefix_sha1:
+            self._reset()
+            hasher = self._prefix_hasher()
+        before = self.count
+        with open(self.file_path, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                block = f.read(_BLOCK_BYTES)
+                if not block:
+                    self._pending = None
+                    break
+                cut = block.rfind(b"\n") + 1
+                if cut == 0 and len(block) < _BLOCK_BYTES:
+                    # Last line has no newline yet, count it but read it again next time
+                    self._pending = self._moments_of(block)
+                    break
+                if cut == 0:
+                    raise ValueError(f"Line longer than {_BLOCK_BYTES} bytes in {self.file_path}")
+                self.moments.merge(self._moments_of(block[:cut]))
+                hasher.update(block[:cut])
+                self.offset += cut
+                f.seek(self.offset)
+        self.prefix_sha1 = hasher.hexdigest()
+        self._save()
+        return self.count - before
+
+    def stats(self) -> Dict[str, object]:
+        """Running normalization statistics, target std with ddof=1 and feature std with ddof=0"""
+        moments = self._current()
+        return {
+            "count": moments.count,
+            "target_mean": float(moments.mean[-1]),
+            "target_std": float(moments.std(ddof=1)[-1]),
+            "feature_mean": moments.mean[:-1],
+            "feature_std": moments.std(ddof=0)[:-1],
+        }
+
+    def transform(self, X: np.ndarray, y: Optional[np.ndarray] = None):
+        """Standardize X (and normalize y) with the running statistics instead of recomputing them"""
+        stats = self.stats()
+        X = (np.asarray(X, dtype=float) - stats["feature_mean"]) / stats["feature_std"]
+        if y is None:
+            return X
+        return X, (np.asarray(y, dtype=float) - stats["target_mean"]) / stats["target_std"]
+
+    def model(self) -> CustomTemperaturePredictor:
+        """Normal equation predictor for standardized X / normalized y, solved from the moments alone"""
+        moments = self._current()
+        model = CustomTemperaturePredictor(solver="normal")
+        if moments.count < 2:
+            return model
+        beta, intercept = _least_squares(moments)
+        stats = self.stats()
+        # Same fit rewritten for the scaled inputs: y' = (X' * sx + mx) @ beta + b, minus my, over sy
+        model.weights = beta * stats["feature_std"] / stats["target_std"]
+        model.bias = float((stats["feature_mean"] @ beta + intercept - stats["target_mean"]) / stats["target_std"])
+        model.n_iter_ = 0
+        return model
+
+    def _current(self) -> RunningStats:
+        """Committed moments plus the pending last line, the first call without a state reads the file"""
+        if self.moments is None:
+            self.refresh()
+        if self._pending is None:
+            return self.moments
+        return self.moments.copy().merge(self._pending)
+
+    def _moments_of(self, data: bytes) -> RunningStats:
+        """Parse complete CSV lines of the body and return the moments of their clean rows"""
+        if not data.strip():
+            return RunningStats(len(self.features) + 1, covariance=True)
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=self.columns, comment="#")
+        chunk = self._processor.clean_chunk(chunk)
+        if self.target_column not in chunk.columns or "year" not in chunk.columns:
+            raise ValueError(f"Missing required columns; 'year' and '{self.target_column}'")
+        values = chunk[self.features + [self.target_column]].to_numpy(dtype=float)
+        return RunningStats(len(self.features) + 1, covariance=True).update(values)
+
+    def _reset(self) -> None:
+        """Start over at the first body line of the file"""
+        _, n_header = read_noaa_header(self.file_path)
+        with open(self.file_path, "rb") as f:
+            for _ in range(n_header):
+                f.readline()
+            header = f.readline()
+            self.offset = f.tell()
+        self.columns = [col.strip() for col in header.decode("utf-8").rstrip("\r\n").split(",")]
+        cleaned = self._processor.clean_chunk(pd.DataFrame(columns=self.columns))
+        self.features = DataProcessor.feature_columns(cleaned)
+        self.moments = RunningStats(len(self.features) + 1, covariance=True)
+        self._pending = None
+
+    def _prefix_hasher(self):
+        """sha1 of the bytes before the offset, None when the file is gone or shorter than that
+
+        The hash object is returned so refresh() can go on feeding it the newly committed bytes.
+        """
+        hasher = hashlib.sha1()
+        remaining = self.offset
+        try:
+            with open(self.file_path, "rb") as f:
+                while remaining:
+                    block = f.read(min(remaining, _BLOCK_BYTES))
+                    if not block:
+                        return None
+                    hasher.update(block)
+                    remaining -= len(block)
+        except OSError:
+            return None
+        return hasher
+
+    def _load(self) -> None:
+        """Read the stored state, anything unreadable starts from scratch on refresh"""
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != STATE_VERSION:
+            return
+        self.columns = state["columns"]
+        self.features = state["features"]
+        self.offset = state["offset"]
+        self.prefix_sha1 = state["prefix_sha1"]
+        self.moments = RunningStats.from_dict(state["moments"])
+        if state.get("pending") is not None:
+            self._pending = RunningStats.from_dict(state["pending"])
+
+    def _save(self) -> None:
+        """Write the state atomically"""
+        state = {
+            "version": STATE_VERSION,
+            "source": os.path.abspath(self.file_path),
+            "target_column": self.target_column,
+            "columns": self.columns,
+            "features": self.features,
+            "offset": self.offset,
+            "prefix_sha1": self.prefix_sha1,
+            "moments": self.moments.to_dict(),
+            "pending": self._pending.to_dict() if self._pending is not None else None,
+        }
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Could not save the incremental state of {self.file_path}: {e}")
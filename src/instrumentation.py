@@ -0,0 +1,125 @@
+import bisect
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Upper bounds (seconds) of the latency histogram buckets, the last bucket is +inf
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """Thread-safe cumulative counters and latency histograms"""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initializes an empty registry with the histogram bucket bounds"""
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one latency in the histogram of name"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = {"count": 0, "sum": 0.0, "counts": [0] * (len(self.buckets) + 1)}
+                self._histograms[name] = histogram
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+            histogram["counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        """Copy of everything recorded so far, histogram buckets are cumulative like Prometheus"""
+        with self._lock:
+            latency = {}
+            for name, histogram in self._histograms.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(list(self.buckets) + ["+Inf"], histogram["counts"]):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                latency[name] = {"count": histogram["count"], "sum": histogram["sum"], "buckets": buckets}
+            return {"counters": dict(self._counters), "latency": latency}
+
+    def reset(self) -> None:
+        """Forget all counters and histograms"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class Profiler:
+    """Collects named span timings (and optionally tracemalloc peaks) for one run
+
+    Spans are meant to be used one after the other, not nested, because measuring the
+    memory peak of a span resets the tracemalloc peak.
+    """
+    def __init__(self, trace_memory: bool = False, registry: Optional[MetricsRegistry] = None):
+        """trace_memory turns on tracemalloc peaks, registry also receives every span duration"""
+        self.trace_memory = trace_memory
+        self.registry = registry
+        self.records = []  # (name, seconds, peak bytes or None) in order
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the body of the with block under name"""
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = None
+            if self.trace_memory:
+                peak = max(tracemalloc.get_traced_memory()[1] - base, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.records.append((name, seconds, peak))
+            if self.registry is not None:
+                self.registry.observe(f"stage.{name}", seconds)
+
+    def summary(self) -> List[Dict[str, object]]:
+        """Per stage totals in first-seen order"""
+        totals = {}
+        for name, seconds, peak in self.records:
+            entry = totals.setdefault(name, {"stage": name, "calls": 0, "seconds": 0.0, "peak_bytes": None})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            if peak is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, peak)
+        return list(totals.values())
+
+    def format_report(self) -> str:
+        """Human readable stage breakdown"""
+        summary = self.summary()
+        total = sum(entry["seconds"] for entry in summary) or 1.0
+        lines = [f"{'stage':<24}{'calls':>6}{'seconds':>12}{'share':>8}" + (f"{'peak MiB':>11}" if self.trace_memory else "")]
+        for entry in summary:
+            line = f"{entry['stage']:<24}{entry['calls']:>6}{entry['seconds']:>12.4f}{entry['seconds'] / total:>8.1%}"
+            if self.trace_memory:
+                line += f"{(entry['peak_bytes'] or 0) / 2 ** 20:>11.2f}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class _NullProfiler:
+    """Stand-in when profiling is off, spans cost nothing"""
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        yield
+
+
+NULL_PROFILER = _NullProfiler()
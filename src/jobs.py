@@ -0,0 +1,136 @@
+import threading
+import time
+import traceback
+import uuid
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by JobManager.submit when max_pending jobs are already queued or running"""
+
+
+class Job:
+    """One background analysis with its status, progress messages and result"""
+    def __init__(self, job_id: str, description: str = ""):
+        """Initializes a queued job"""
+        self.id = job_id
+        self.description = description
+        self.status = QUEUED
+        self.events = []  # progress messages in order
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def is_finished(self) -> bool:
+        """True once the job is done or failed"""
+        return self.status in (DONE, ERROR)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON friendly view of the job without the result payload"""
+        return {
+            "id": self.id,
+            "description": self.description,
+            "status": self.status,
+            "progress": list(self.events),
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobManager:
+    """Runs callables in a worker pool and keeps a bounded store of their jobs
+
+    The callable receives a progress keyword argument, calling progress("message") records
+    a progress event that pollers and event streams can pick up.
+    """
+    def __init__(self, max_workers: int = 2, max_jobs: int = 500, max_pending: int = 100):
+        """Initializes the pool, the maximum number of jobs kept in the store and of unfinished jobs"""
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self._pending = 0  # queued or running, these are never pruned
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs = OrderedDict()
+        self._changed = threading.Condition()
+
+    def submit(self, fn: Callable[..., Any], *args, description: str = "", **kwargs) -> str:
+        """Queue fn(*args, progress=..., **kwargs) and return the new job id, JobQueueFull if too many are waiting"""
+        job = Job(uuid.uuid4().hex, description)
+        with self._changed:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs are already queued or running")
+            self._pending += 1
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job with this id, None if unknown or already pruned"""
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait_for_events(self, job_id: str, since: int = 0, timeout: float = 15.0) -> Tuple[List[str], bool]:
+        """Block until the job has events past index since or finishes, returns (new events, finished)"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return [], True
+                if len(job.events) > since or job.is_finished:
+                    return job.events[since:], job.is_finished
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], False
+                self._changed.wait(remaining)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        """Worker side: run the callable and record the outcome"""
+        self._update(job, status=RUNNING)
+        try:
+            result = fn(*args, progress=lambda message: self._update(job, event=message), **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, status=ERROR, error=str(e))
+        else:
+            self._update(job, status=DONE, result=result)
+
+    def _update(self, job: Job, status: Optional[str] = None, event: Optional[str] = None,
+                result: Any = None, error: Optional[str] = None) -> None:
+        """Change a job under the lock and wake everyone waiting for events"""
+        with self._changed:
+            if event is not None:
+                job.events.append(event)
+            if result is not None:
+                job.result = result
+            if error is not None:
+                job.error = error
+            if status is not None:
+                job.status = status
+                if job.is_finished:
+                    job.finished = time.time()
+                    self._pending -= 1
+            self._changed.notify_all()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs once the store is full, the lock must be held"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].is_finished:
+                del self._jobs[job_id]
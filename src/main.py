@@ -1,54 +1,36 @@
 import os
 
-import numpy as np
+# The heavy stacks (pandas, scikit-learn, matplotlib) are imported in main() so that
+# helpers like list_data_files can be imported cheaply from other modules
 
 
-from src.data_processor import DataProcessor
-from src.algorithms import (
-    CustomTemperaturePredictor,
-    custom_clustering,
-    detect_anomalies
-)
-from src.visualizer import Visualizer
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
 
+_catalog = None
 
-DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+def data_catalog(index_path=None):
+    """The shared DataCatalog of DATA_DIR, created on first use with index_path (or $ANALYZER_CATALOG_INDEX)"""
+    global _catalog
+    if _catalog is None:
+        from src.catalog import DataCatalog
+        _catalog = DataCatalog(DATA_DIR, index_path=index_path)
+    return _catalog
 
-def auto_detect_target_column(filename, df):
-    """Will guess the target column from the filename or the DataFrame headers"""
-    lower_name = filename.lower()
-
-    if "temp" in lower_name:
-        return "temperature"
-    elif "precip" in lower_name:
-        return "precipitation"
-    elif "anom" in lower_name:
-        return "anomaly"
-
-    # goes through the DF columns for common name
-    for col in df.columns:
-        if col in ["temperature", "precipitation", "anomaly"]:
-            return col
-        if "temp" in col.lower():
-            return col
-        if "precip" in col.lower():
-            return col
-        if "anom" in col.lower():
-            return col
-    return None
+def detect_target_column(rel_path):
+    """Target column of a file in DATA_DIR from the catalog, no CSV is parsed"""
+    return data_catalog().target_column(rel_path)
 
 def list_data_files():
-    """ finds all .csv file in the directory """
-    options = []
-    for root, _, files in os.walk(DATA_DIR):
-        for file in files:
-            if file.endswith(".csv"):
-                rel_path = os.path.relpath(os.path.join(root, file), DATA_DIR)
-                options.append(rel_path)
-    return sorted(options)
+    """ finds all .csv file in the directory, answered from the catalog """
+    return data_catalog().files()
 
 def main():
     """Main function to process data /prediction /clustering /anomaly detection"""
+    from src.cache import DatasetCache
+    from src.data_processor import DataProcessor
+    from src.algorithms import custom_clustering, detect_anomalies
+    from src.predictor import CustomTemperaturePredictor
+    from src.visualizer import Visualizer
 
     
     print("Availabl data files:")
@@ -67,8 +49,8 @@ def main():
     filepath = os.path.join(DATA_DIR, selected_file)
     print(f"\n Selected file: {selected_file}")
 
-    raw_df = DataProcessor(filepath, target_column="dummy").load_data()
-    target_column = auto_detect_target_column(selected_file, raw_df)
+    cache = DatasetCache()
+    target_column = detect_target_column(selected_file)
 
     if not target_column:
         print("Could not detect target column Please change / edit")
@@ -76,7 +58,7 @@ def main():
 
     print(f"Detected target column: '{target_column}'")
 
-    processor = DataProcessor(filepath, target_column)
+    processor = DataProcessor(filepath, target_column, cache=cache)
     df = processor.load_data()
     df = processor.clean_data()
     df = processor.normalize_temperature()  # normalizin the temp values
@@ -94,7 +76,7 @@ def main():
     
     
     print("\n Running Prediction.")
-    model = CustomTemperaturePredictor(learning_rate=0.001, n_iterations=1000)
+    model = CustomTemperaturePredictor(learning_rate=0.001, n_iterations=1000, solver="normal")
     model.fit(X, y)
 
     if model.weights is None:
@@ -109,7 +91,7 @@ def main():
 
 
     print("\n Running Clustering.")
-    labels = custom_clustering(X, n_clusters=3)
+    labels = custom_clustering(X, n_clusters=3, n_jobs=None)
     print("Cluster Labels (first 10):", labels[:10])
     Visualizer.plot_clusters(list(X), labels)
 
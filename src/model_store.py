@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Optional
+
+from src.cache import DEFAULT_CACHE_DIR, content_hash, file_fingerprint
+from src.data_processor import DataProcessor
+from src.incremental import IncrementalModel
+from src.predictor import CustomTemperaturePredictor
+
+# Saved models live next to the parse cache entries unless ANALYZER_MODEL_DIR points elsewhere
+DEFAULT_MODEL_DIR = os.path.join(DEFAULT_CACHE_DIR, "models")
+
+MODEL_VERSION = 1
+
+
+class ModelArtifact:
+    """A fitted predictor plus everything needed to serve it
+
+    normalization holds feature_mean / feature_std (how X was standardized) and target_mean /
+    target_std (how y was normalized), source is the fingerprint of the CSV it was trained on.
+    """
+    def __init__(self, model: CustomTemperaturePredictor, normalization: Dict[str, object],
+                 source: Dict[str, object], target_column: str):
+        """Initializes the artifact"""
+        self.model = model
+        self.normalization = {
+            "feature_mean": np.asarray(normalization["feature_mean"], dtype=float),
+            "feature_std": np.asarray(normalization["feature_std"], dtype=float),
+            "target_mean": float(normalization["target_mean"]),
+            "target_std": float(normalization["target_std"]),
+        }
+        self.source = source
+        self.target_column = target_column
+
+    def predict(self, X: np.ndarray, denormalize: bool = True) -> np.ndarray:
+        """Predict from raw year (/ month) features, in the units of the file unless denormalize is False"""
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.normalization["feature_mean"]))
+        X = (X - self.normalization["feature_mean"]) / self.normalization["feature_std"]
+        predictions = self.model.predict(X)
+        if denormalize:
+            return predictions * self.normalization["target_std"] + self.normalization["target_mean"]
+        return predictions
+
+    def is_stale(self) -> bool:
+        """True when the source CSV changed (or vanished) since training"""
+        try:
+            current = file_fingerprint(self.source["path"])
+        except OSError:
+            return True
+        if current["size"] != self.source["size"]:
+            return True
+        if current["mtime_ns"] != self.source["mtime_ns"]:
+            # Touched but maybe not changed, the content hash decides
+            if content_hash(self.source["path"]) != self.source["sha1"]:
+                return True
+            self.source["mtime_ns"] = current["mtime_ns"]
+        return False
+
+
+def train_model(file_path: str, target_column: str) -> Optional[ModelArtifact]:
+    """Fit the closed form predictor on one file the way the entry points do, None without usable data"""
+    # Fingerprint first, a change while we train then shows up as stale
+    source = dict(file_fingerprint(file_path, with_hash=True), path=os.path.abspath(file_path))
+    processor = DataProcessor(file_path, target_column)
+    processor.load_data()
+    processor.clean_data()
+    processor.normalize_temperature()
+    X, y = processor.get_features_and_target()
+    if X.size == 0 or y.size == 0:
+        return None
+    X, feature_mean, feature_std = processor.standardize_features()
+    model = CustomTemperaturePredictor(solver="normal").fit(X, y)
+    if model.weights is None:
+        return None
+    normalization = {"feature_mean": feature_mean, "feature_std": feature_std,
+                     "target_mean": processor.target_mean, "target_std": processor.target_std}
+    return ModelArtifact(model, normalization, source, target_column)
+
+
+def update_model(file_path: str, target_column: str, state_dir: str) -> Optional[ModelArtifact]:
+    """train_model through the file's IncrementalModel, after an append only the new rows are parsed
+
+    Gives the same model as train_model. Files the incremental reader cannot handle fall back to it.
+    """
+    source = dict(file_fingerprint(file_path, with_hash=True), path=os.path.abspath(file_path))
+    tracker = IncrementalModel(file_path, target_column, state_dir=state_dir)
+    try:
+        tracker.refresh()
+    except (ValueError, pd.errors.ParserError) as e:
+        print(f"Incremental update of {file_path} failed ({e}), training from scratch")
+        return train_model(file_path, target_column)
+    model = tracker.model()
+    if model.weights is None:
+        return None
+    stats = tracker.stats()
+    normalization = {key: stats[key] for key in ("feature_mean", "feature_std", "target_mean", "target_std")}
+    return ModelArtifact(model, normalization, source, target_column)
+
+
+def save_model(artifact: ModelArtifact, path: str) -> None:
+    """Write an artifact as JSON, atomically"""
+    model = artifact.model
+    data = {
+        "version": MODEL_VERSION,
+        "params": model.get_params(),
+        "weights": np.asarray(model.weights, dtype=float).tolist(),
+        "bias": float(model.bias),
+        "n_iter": int(model.n_iter_),
+        "normalization": {
+            "feature_mean": artifact.normalization["feature_mean"].tolist(),
+            "feature_std": artifact.normalization["feature_std"].tolist(),
+            "target_mean": artifact.normalization["target_mean"],
+            "target_std": artifact.normalization["target_std"],
+        },
+        "source": artifact.source,
+        "target_column": artifact.target_column,
+    }
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_model(path: str) -> ModelArtifact:
+    """Read an artifact written by save_model, ValueError if it is not one"""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("version") != MODEL_VERSION:
+        raise ValueError(f"Unsupported model file version in {path}")
+    model = CustomTemperaturePredictor(**data["params"])
+    model.weights = np.asarray(data["weights"], dtype=float)
+    model.bias = float(data["bias"])
+    model.n_iter_ = data["n_iter"]
+    return ModelArtifact(model, data["normalization"], data["source"], data["target_column"])
+
+
+class ModelRegistry:
+    """Trained models of every data file, kept in memory and on disk
+
+    get() hands out the model of a file and retrains it only when its CSV changed, so serving
+    a prediction is a lookup plus a dot product. Models are saved to model_dir so a restart
+    loads them instead of training again. Training goes through an IncrementalModel per file
+    (state in model_dir/incremental), so a file that only had rows appended is not parsed again.
+    """
+    def __init__(self, data_dir: str, model_dir: Optional[str] = None, catalog=None):
+        """Initializes the registry, catalog (a DataCatalog) supplies the file list and target columns
+
+        model_dir defaults to $ANALYZER_MODEL_DIR or DEFAULT_MODEL_DIR.
+        """
+        self.data_dir = os.path.abspath(data_dir)
+        self.model_dir = model_dir or os.environ.get("ANALYZER_MODEL_DIR") or DEFAULT_MODEL_DIR
+        self.state_dir = os.path.join(self.model_dir, "incremental")
+        self.catalog = catalog
+        self._models = {}  # rel path -> ModelArtifact
+        self._locks = {}  # rel path -> lock so one file is never trained twice at once
+        self._lock = threading.Lock()
+        self.trained = 0
+        self.loaded = 0
+
+    def preload(self) -> int:
+        """Load or train the model of every file in the catalog, returns how many are ready"""
+        return sum(self.get(rel_path) is not None for rel_path in self._files())
+
+    def get(self, rel_path: str) -> Optional[ModelArtifact]:
+        """Fresh model of one file, None when it is not a data file, has no target column or not enough data"""
+        rel_path = self._key(rel_path)
+        if rel_path is None:
+            # Checked before a lock is made for it, so made up names do not pile up locks
+            return None
+        with self._lock:
+            artifact = self._models.get(rel_path)
+            file_lock = self._locks.setdefault(rel_path, threading.Lock())
+        if artifact is not None and not artifact.is_stale():
+            return artifact
+
+        with file_lock:
+            # Another thread may have refreshed it while we waited
+            with self._lock:
+                artifact = self._models.get(rel_path)
+            if artifact is not None and not artifact.is_stale():
+                return artifact
+            artifact = self._load_or_train(rel_path)
+            with self._lock:
+                if artifact is None:
+                    self._models.pop(rel_path, None)
+                else:
+                    self._models[rel_path] = artifact
+            return artifact
+
+    def invalidate(self, rel_path: str) -> None:
+        """Forget the model of one file in memory and on disk"""
+        rel_path = os.path.normpath(rel_path)
+        with self._lock:
+            self._models.pop(rel_path, None)
+        try:
+            os.remove(self._model_path(rel_path))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """How many models are in memory, were trained and were loaded from disk"""
+        with self._lock:
+            return {"models": len(self._models), "trained": self.trained, "loaded": self.loaded}
+
+    def _files(self) -> List[str]:
+        """Every data file the registry can serve"""
+        if self.catalog is not None:
+            return self.catalog.files()
+        options = []
+        for root, _, files in os.walk(self.data_dir):
+            for file in files:
+                if file.endswith(".csv"):
+                    options.append(os.path.relpath(os.path.join(root, file), self.data_dir))
+        return sorted(options)
+
+    def _target_column(self, rel_path: str) -> Optional[str]:
+        """Target column of a file from the catalog or its name"""
+        if self.catalog is not None:
+            return self.catalog.target_column(rel_path)
+        from src.catalog import guess_target_column
+        return guess_target_column(rel_path, [])
+
+    def _key(self, rel_path: str) -> Optional[str]:
+        """Normalized rel path of a servable data file, None for anything outside data_dir or not in the catalog"""
+        rel_path = os.path.normpath(rel_path)
+        if self.catalog is not None:
+            return rel_path if self.catalog.get(rel_path) is not None else None
+        return rel_path if self._file_path(rel_path) is not None else None
+
+    def _file_path(self, rel_path: str) -> Optional[str]:
+        """Resolved path of a CSV inside data_dir, None when rel_path leaves it (.., absolute, symlinks)"""
+        data_dir = os.path.realpath(self.data_dir)
+        file_path = os.path.realpath(os.path.join(data_dir, rel_path))
+        if not file_path.startswith(data_dir + os.sep) or not os.path.isfile(file_path):
+            return None
+        return file_path
+
+    def _model_path(self, rel_path: str) -> str:
+        """Model file of one data file"""
+        key = hashlib.sha1(os.path.join(self.data_dir, rel_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.model_dir, f"{key}.json")
+
+    def _load_or_train(self, rel_path: str) -> Optional[ModelArtifact]:
+        """Saved model if it still matches its CSV, otherwise a freshly trained (and saved) one"""
+        file_path = self._file_path(rel_path)
+        if file_path is None:
+            return None
+        target_column = self._target_column(rel_path)
+        if not target_column:
+            return None
+
+        model_path = self._model_path(rel_path)
+        try:
+            artifact = load_model(model_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            artifact = None
+        if artifact is not None and artifact.target_column == target_column and not artifact.is_stale():
+            with self._lock:
+                self.loaded += 1
+            return artifact
+
+        artifact = update_model(file_path, target_column, self.state_dir)
+        if artifact is None:
+            return None
+        with self._lock:
+            self.trained += 1
+        try:
+            save_model(artifact, model_path)
+        except OSError as e:
+            print(f"Could not save the model of {rel_path}: {e}")
+        return artifact
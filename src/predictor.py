@@ -0,0 +1,153 @@
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from typing import List, Optional, Sequence, Tuple, Union
+
+# Above this the normal equations are too ill conditioned for Cholesky
+_MAX_CONDITION = 1e10
+
+class CustomTemperaturePredictor(BaseEstimator, RegressorMixin):
+    """A temperature predictor for future treends"""
+    def __init__(self, learning_rate: float = 0.01, n_iterations: int = 1000,
+                 solver: str = "gd", tol: Optional[float] = None, warm_start: bool = False):
+        """Initializes the predictor with rate and iterations
+
+        solver is "gd" for gradient descent or "normal" for the closed form least squares
+        solution, tol stops gradient descent early once the gradient norm drops below it.
+        warm_start makes gradient descent continue from the weights of the previous fit.
+        """
+        self.learning_rate = learning_rate
+        self.n_iterations = n_iterations
+        self.solver = solver
+        self.tol = tol
+        self.warm_start = warm_start
+        self.weights = None  # will be inited later
+        self.bias = None     
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'CustomTemperaturePredictor':
+        '''Check for any NaN values on x and y, n_iter_ holds the iterations the fit actually used'''
+        if np.isnan(X).any() or np.isnan(y).any():
+            print("NaN detected in input data so skipping training..")
+            return self
+
+        if self.solver == "normal":
+            self.weights, self.bias = _solve_normal_equation(X, y)
+            self.n_iter_ = 0
+            return self
+        if self.solver != "gd":
+            raise ValueError(f"Unknown solver '{self.solver}', use 'gd' or 'normal'")
+    
+        n_samples, n_features = X.shape
+        if not (self.warm_start and self.weights is not None and len(self.weights) == n_features):
+            # Init weights and bias to zeros 
+            self.weights = np.zeros(n_features)
+            self.bias = 0.0
+        else:
+            self.weights = np.array(self.weights, dtype=float)
+
+        self.n_iter_ = self.n_iterations
+        for i in range(self.n_iterations):
+            y_predicted = np.dot(X, self.weights) + self.bias
+            dw = (1 / n_samples) * np.dot(X.T, (y_predicted - y))
+            db = (1 / n_samples) * np.sum(y_predicted - y)
+
+            # Update our parameters
+            self.weights -= self.learning_rate * dw
+            self.bias -= self.learning_rate * db
+
+            # Stop once the gradient is flat enough
+            if self.tol is not None and np.sqrt(np.dot(dw, dw) + db * db) < self.tol:
+                self.n_iter_ = i + 1
+                break
+
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict values using the parameters."""
+        if self.weights is None or self.bias is None:
+            raise ValueError("Model has not been trained yet so call fit() first.")
+        return np.dot(X, self.weights) + self.bias
+
+
+def _solve_normal_equation(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Exact least squares weights and bias from the small (features+1)^2 system X.T @ X"""
+    # Add a column of ones so the bias is solved together with the weights
+    X_aug = np.column_stack([X, np.ones(X.shape[0])]).astype(float)
+    gram = X_aug.T @ X_aug
+    rhs = X_aug.T @ y
+    if np.linalg.cond(gram) < _MAX_CONDITION:
+        L = np.linalg.cholesky(gram)
+        theta = np.linalg.solve(L.T, np.linalg.solve(L, rhs))
+    else:
+        # (Nearly) singular system e.g. a constant feature, so lstsq gives the minimum norm answer
+        theta = np.linalg.lstsq(X_aug, y, rcond=None)[0]
+    return theta[:-1], float(theta[-1])
+
+
+def fit_batched(X: Union[np.ndarray, Sequence[np.ndarray]], y: Union[np.ndarray, Sequence[np.ndarray]],
+                mask: Optional[np.ndarray] = None) -> List[CustomTemperaturePredictor]:
+    """Fit one closed form predictor per series in a single stacked solve
+
+    X is either a (series, samples, features) array or a list of (samples, features) arrays
+    with ragged lengths, y matches it. mask marks the valid samples and is built from the
+    lengths when lists are given. Returns one fitted CustomTemperaturePredictor per series.
+    """
+    if mask is None and not isinstance(X, np.ndarray):
+        X, y, mask = _pad_series(X, y)
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if X.ndim != 3 or y.shape != X.shape[:2]:
+        raise ValueError("X must be (series, samples, features) and y (series, samples)")
+    mask = np.ones(y.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+
+    # Same NaN rule as fit(): a series with NaN in its valid part is not trained
+    bad = (np.isnan(X).any(axis=2) | np.isnan(y)) & mask
+    skipped = bad.any(axis=1)
+
+    # Padded / skipped rows become zeros so they drop out of X.T @ X and X.T @ y
+    weights = (mask & ~skipped[:, None]).astype(float)
+    X_aug = np.concatenate([np.nan_to_num(X), np.ones(y.shape + (1,))], axis=2) * weights[:, :, None]
+    y_masked = np.nan_to_num(y) * weights
+
+    gram = np.einsum("snd,sne->sde", X_aug, X_aug)
+    rhs = np.einsum("snd,sn->sd", X_aug, y_masked)
+
+    theta = np.zeros(rhs.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        well_posed = ~skipped & (np.linalg.cond(gram) < _MAX_CONDITION)
+    if well_posed.any():
+        theta[well_posed] = np.linalg.solve(gram[well_posed], rhs[well_posed][:, :, None])[:, :, 0]
+    for i in np.flatnonzero(~well_posed & ~skipped):
+        # Rare singular series (constant feature, too few rows) get the minimum norm answer
+        theta[i] = np.linalg.lstsq(X_aug[i], y_masked[i], rcond=None)[0]
+
+    models = []
+    for i in range(len(theta)):
+        model = CustomTemperaturePredictor(solver="normal")
+        if skipped[i]:
+            print(f"NaN detected in series {i} so skipping training..")
+        else:
+            model.weights = theta[i, :-1]
+            model.bias = float(theta[i, -1])
+            model.n_iter_ = 0
+        models.append(model)
+    return models
+
+
+def _pad_series(X_list: Sequence[np.ndarray], y_list: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stack ragged series into zero padded arrays plus a validity mask"""
+    if len(X_list) != len(y_list):
+        raise ValueError("X and y must hold the same number of series")
+    X_list = [np.asarray(x, dtype=float).reshape(len(x), -1) for x in X_list]
+    n_features = {x.shape[1] for x in X_list}
+    if len(n_features) > 1:
+        raise ValueError("All series must have the same number of features")
+
+    max_len = max(len(x) for x in X_list)
+    X = np.zeros((len(X_list), max_len, n_features.pop()))
+    y = np.zeros((len(X_list), max_len))
+    mask = np.zeros((len(X_list), max_len), dtype=bool)
+    for i, (x_i, y_i) in enumerate(zip(X_list, y_list)):
+        X[i, :len(x_i)] = x_i
+        y[i, :len(y_i)] = y_i
+        mask[i, :len(x_i)] = True
+    return X, y, mask
@@ -0,0 +1,238 @@
+# Time series cross-validated grid search for the predictor, run in a process pool
+#
+#   python -m src.cli tune --workers 8 --output tuning.jsonl
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+
+# What the entry points hard-code today plus the neighbours worth trying
+DEFAULT_PARAM_GRID = {
+    "solver": ["gd"],
+    "learning_rate": [0.001, 0.01, 0.1],
+    "n_iterations": [100, 1000, 5000],
+}
+
+# Shared memory blocks a worker process has attached to, by name
+_ATTACHED = {}
+
+
+def time_series_folds(n_samples: int, n_splits: int = 5) -> List[Tuple[int, int]]:
+    """(train_end, test_end) of expanding window folds, every fold trains on the past only"""
+    n_splits = min(n_splits, n_samples - 1)
+    if n_splits < 2:
+        raise ValueError(f"Need at least 3 samples for time series cross-validation, got {n_samples}")
+    return [(int(train[-1]) + 1, int(test[-1]) + 1)
+            for train, test in TimeSeriesSplit(n_splits=n_splits).split(np.empty(n_samples))]
+
+
+class _SharedDatasets:
+    """All X / y arrays copied once into one shared memory block, workers map it instead of copying"""
+    def __init__(self, datasets: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """Copies every dataset into the block and remembers where each array lives"""
+        arrays = []
+        for name, (X, y) in datasets.items():
+            X = np.asarray(X, dtype=float)
+            arrays.append((name, X.reshape(len(X), -1), np.asarray(y, dtype=float)))
+        total = sum(X.nbytes + y.nbytes for _, X, y in arrays)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        self.layout = {}  # name -> ((X offset, X shape), (y offset, y shape))
+        offset = 0
+        for name, X, y in arrays:
+            entry = []
+            for array in (X, y):
+                np.ndarray(array.shape, dtype=float, buffer=self.shm.buf, offset=offset)[...] = array
+                entry.append((offset, array.shape))
+                offset += array.nbytes
+            self.layout[name] = tuple(entry)
+
+    def close(self) -> None:
+        """Release and remove the block"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _shared_arrays(shm_name: str, layout: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker side: read-only views of one dataset in the shared block"""
+    shm = _ATTACHED.get(shm_name)
+    if shm is None:
+        shm = _ATTACHED[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    views = []
+    for offset, shape in layout:
+        view = np.ndarray(shape, dtype=float, buffer=shm.buf, offset=offset)
+        view.flags.writeable = False
+        views.append(view)
+    return views[0], views[1]
+
+
+def _fold_scaling(X_train: np.ndarray, y_train: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """(X mean, X std, y mean, y std) of the training rows only, scaled like the entry points do"""
+    X_mean, X_std = X_train.mean(axis=0), X_train.std(axis=0)
+    y_mean = float(y_train.mean())
+    y_std = float(y_train.std(ddof=1)) if len(y_train) > 1 else 1.0
+    # A column that is constant in this window (month of a short fold) is only centered
+    X_std = np.where(X_std > 0, X_std, 1.0)
+    return X_mean, X_std, y_mean, y_std if y_std > 0 else 1.0
+
+
+def _score_fold(estimator, X: np.ndarray, y: np.ndarray, train_end: int, test_end: int) -> Tuple[float, float]:
+    """Fit on the rows before train_end, return (test MSE in the units of y, seconds)
+
+    The scaling is fitted on the training rows and applied to the test rows, so nothing of the
+    future leaks into the fit.
+    """
+    start = time.perf_counter()
+    try:
+        X_train, y_train = X[:train_end], y[:train_end]
+        X_mean, X_std, y_mean, y_std = _fold_scaling(X_train, y_train)
+        estimator.fit((X_train - X_mean) / X_std, (y_train - y_mean) / y_std)
+        predictions = estimator.predict((X[train_end:test_end] - X_mean) / X_std) * y_std + y_mean
+        score = float(np.mean((predictions - y[train_end:test_end]) ** 2))
+    except ValueError:
+        # Not trained (NaN data) so this candidate loses
+        score = float("inf")
+    if not np.isfinite(score):
+        score = float("inf")
+    return score, time.perf_counter() - start
+
+
+def _fold_task(task) -> Tuple[float, float]:
+    """Process pool entry point for one (dataset, params, fold)"""
+    shm_name, layout, estimator, params, train_end, test_end = task
+    X, y = _shared_arrays(shm_name, layout)
+    with contextlib.redirect_stdout(sys.stderr):
+        return _score_fold(clone(estimator).set_params(**params), X, y, train_end, test_end)
+
+
+def grid_search_many(estimator, param_grid: Dict[str, Sequence], datasets: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                     n_splits: int = 5, workers: Optional[int] = None) -> Dict[str, Dict[str, object]]:
+    """Cross-validate every grid point on every dataset, all folds of all datasets share one pool
+
+    X / y are raw, every fold standardizes X and normalizes y with the statistics of its own
+    training rows. The arrays are placed once in shared memory, so memory does not grow with
+    the worker count. Scores are test MSE of expanding window folds in the units of y (lower is better). Returns per dataset name
+    best_params, best_score and results (params, mean_score, fold_scores, fold_seconds per point).
+    workers=1 runs in this process without a pool.
+    """
+    candidates = list(ParameterGrid(param_grid))
+    folds = {name: time_series_folds(len(y), n_splits) for name, (_, y) in datasets.items()}
+    keys = [(name, c, f) for name in datasets for c in range(len(candidates)) for f in range(len(folds[name]))]
+
+    if workers == 1:
+        outcomes = []
+        for name, c, f in keys:
+            X, y = datasets[name]
+            X = np.asarray(X, dtype=float).reshape(len(X), -1)
+            with contextlib.redirect_stdout(sys.stderr):
+                outcomes.append(_score_fold(clone(estimator).set_params(**candidates[c]), X,
+                                            np.asarray(y, dtype=float), *folds[name][f]))
+    else:
+        shared = _SharedDatasets(datasets)
+        try:
+            tasks = [(shared.shm.name, shared.layout[name], estimator, candidates[c], *folds[name][f])
+                     for name, c, f in keys]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(_fold_task, tasks, chunksize=max(len(tasks) // (4 * (workers or os.cpu_count() or 1)), 1)))
+        finally:
+            shared.close()
+
+    report = {}
+    scores = dict(zip(keys, outcomes))
+    for name in datasets:
+        results = []
+        for c, params in enumerate(candidates):
+            fold_outcomes = [scores[(name, c, f)] for f in range(len(folds[name]))]
+            fold_scores = [score for score, _ in fold_outcomes]
+            results.append({
+                "params": params,
+                "mean_score": float(np.mean(fold_scores)),
+                "fold_scores": fold_scores,
+                "fold_seconds": [seconds for _, seconds in fold_outcomes],
+            })
+        best = min(results, key=lambda result: result["mean_score"])
+        report[name] = {"best_params": best["params"], "best_score": best["mean_score"], "results": results}
+    return report
+
+
+def grid_search(estimator, param_grid: Dict[str, Sequence], X: np.ndarray, y: np.ndarray,
+                n_splits: int = 5, workers: Optional[int] = None) -> Dict[str, object]:
+    """grid_search_many for a single dataset"""
+    return grid_search_many(estimator, param_grid, {"data": (X, y)}, n_splits, workers)["data"]
+
+
+def _load_dataset(rel_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Raw X and y of one cleaned data file, None when it has no usable data
+
+    Nothing is scaled here, the folds fit their own scaling on their training rows.
+    """
+    from src.data_processor import DataProcessor
+    from src.main import DATA_DIR, detect_target_column
+
+    target_column = detect_target_column(rel_path)
+    if not target_column:
+        return None
+    processor = DataProcessor(os.path.join(DATA_DIR, rel_path), target_column)
+    processor.load_data()
+    processor.clean_data()
+    X, y = processor.get_features_and_target()
+    if X.size == 0 or y.size == 0:
+        return None
+    return X, y
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Argument parser for the tune subcommand"""
+    parser = argparse.ArgumentParser(prog="python -m src.cli tune",
+                                     description="Tune the predictor on every CSV in data/ with time series cross-validation")
+    parser.add_argument("--folder", help="Only use files from this subfolder of data/")
+    parser.add_argument("--learning_rates", type=float, nargs="+", default=DEFAULT_PARAM_GRID["learning_rate"])
+    parser.add_argument("--n_iterations", type=int, nargs="+", default=DEFAULT_PARAM_GRID["n_iterations"])
+    parser.add_argument("--n_splits", type=int, default=5, help="Number of expanding window folds")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write JSON lines here instead of stdout")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point of the tune subcommand, one JSON line with the best parameters per file"""
+    from src.main import list_data_files
+    from src.predictor import CustomTemperaturePredictor
+
+    args = build_parser().parse_args(argv)
+    files = list_data_files()
+    if args.folder:
+        files = [f for f in files if f.split(os.sep)[0] == args.folder]
+
+    datasets = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        for rel_path in files:
+            dataset = _load_dataset(rel_path)
+            if dataset is not None:
+                datasets[rel_path] = dataset
+    if not datasets:
+        print(" No data files found.", file=sys.stderr)
+        return
+
+    param_grid = {"solver": ["gd"], "learning_rate": args.learning_rates, "n_iterations": args.n_iterations}
+    report = grid_search_many(CustomTemperaturePredictor(), param_grid, datasets, args.n_splits, args.workers)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for rel_path, result in report.items():
+            output.write(json.dumps({"file": rel_path, **result}) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    print(f" Tuning done: {len(report)} files, {len(ParameterGrid(param_grid))} candidates each.", file=sys.stderr)
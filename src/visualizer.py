@@ -1,57 +1,128 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
+import os
+
 import numpy as np
 
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.downsample import DEFAULT_MAX_POINTS, downsample_indices
+
+# Formats the headless export understands
+EXPORT_FORMATS = {"png", "svg", "pdf"}
+
+
+def _new_figure(figsize: Tuple[float, float], interactive: bool) -> Figure:
+    """pyplot figure for on-screen use, otherwise a standalone Figure that never touches pyplot state"""
+    if interactive:
+        # pyplot (and its GUI backend) is only loaded when a window is wanted
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    return Figure(figsize=figsize)
+
+
+def _animation_writer(output: str, fps: int):
+    """Pick the animation writer from the file extension, neither needs a display"""
+    from matplotlib import animation
+
+    ext = os.path.splitext(output)[1].lower()
+    if ext == ".gif":
+        return animation.PillowWriter(fps=fps)
+    if ext == ".mp4":
+        if not animation.writers.is_available("ffmpeg"):
+            raise ValueError("Writing .mp4 needs ffmpeg on the PATH, use .gif instead")
+        return animation.FFMpegWriter(fps=fps)
+    raise ValueError(f"Unsupported animation format '{ext}', use .gif or .mp4")
+
 
 class Visualizer:
     """The class that plots the trends"""
     @staticmethod
-    def plot_trend(years, actual, predicted, show: bool = True):
-        """Plot actual vs predicted value over time"""
-        # Convert to list if they ain't already (avoid NumPy truth value issues)
-        years = list(years)
-        actual = list(actual)
-        predicted = list(predicted)
+    def trend_figure(years, actual, predicted, interactive: bool = False,
+                     max_points: Optional[int] = DEFAULT_MAX_POINTS) -> Optional[Figure]:
+        """Build the actual vs predicted figure, None when there is nothing to plot
+
+        Series longer than max_points are thinned with LTTB (None draws every point).
+        """
+        # Arrays not lists, len() avoids NumPy truth value issues
+        years = np.asarray(years)
+        actual = np.asarray(actual, dtype=float)
+        predicted = np.asarray(predicted, dtype=float)
 
          # If there's no data quits and tell user
-        if not years or not actual or not predicted:
+        if len(years) == 0 or len(actual) == 0 or len(predicted) == 0:
             print("Not enough data for  trend.")
-            return
+            return None
 
+        idx = np.arange(len(years))
+        if max_points is not None and len(years) > max_points:
+            # Half the budget each so both curves keep their shape
+            budget = max(max_points // 2, 3)
+            idx = np.union1d(downsample_indices(actual, budget, x=years),
+                             downsample_indices(predicted, budget, x=years))
 
         # Create a figure and plot both actual and predicted data
-        plt.figure(figsize=(10, 5))
-        plt.plot(years, actual, label="Actual", marker='o')
-        plt.plot(years, predicted, label="Predicted", linestyle="--", marker='x')
-        plt.xlabel("Year")
-        plt.ylabel("Normalized value")
-        plt.title("Climate Trend over time")
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.show()
+        fig = _new_figure((10, 5), interactive)
+        ax = fig.add_subplot()
+        ax.plot(years[idx], actual[idx], label="Actual", marker='o')
+        ax.plot(years[idx], predicted[idx], label="Predicted", linestyle="--", marker='x')
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Normalized value")
+        ax.set_title("Climate Trend over time")
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        return fig
+
+    @staticmethod
+    def plot_trend(years, actual, predicted, show: bool = True,
+                   output: Union[str, BinaryIO, None] = None, fmt: Optional[str] = None,
+                   max_points: Optional[int] = DEFAULT_MAX_POINTS) -> Optional[Figure]:
+        """Plot actual vs predicted value over time, see _finish for show / output / fmt"""
+        fig = Visualizer.trend_figure(years, actual, predicted, interactive=show, max_points=max_points)
+        if fig is None:
+            return None
+        return Visualizer._finish(fig, show, output, fmt)
 
 
     @staticmethod
-    def animate_temperature_comparison(actual, predicted, show: bool = True):
-        """Animate the comparision between actual and predicted values"""
-        import matplotlib.pyplot as plt
+    def animate_temperature_comparison(actual, predicted, show: bool = True, output: Optional[str] = None,
+                                       max_frames: int = 200, fps: int = 10):
+        """Animate the comparision between actual and predicted values
+
+        Long series are decimated to at most max_frames frames. With output (.gif or .mp4) the
+        animation is written through a writer without any display, show opens the window.
+        Returns the FuncAnimation unless it was shown.
+        """
         from matplotlib.animation import FuncAnimation
-        import numpy as np
 
-       
         if len(actual) != len(predicted):
             print("Mismatched lengths so cant animate")
-            return
+            return None
+        if len(actual) == 0:
+            print("Not enough data to animate")
+            return None
+
+        # Fail on a bad output name before any drawing happens
+        writer = _animation_writer(output, fps) if output is not None else None
 
         print("Generating animation")
 
+        # One contiguous copy up front, every frame then only takes O(1) views of it
+        actual = np.asarray(actual, dtype=float)
+        predicted = np.asarray(predicted, dtype=float)
+        x = np.arange(len(actual))
+
+        # Frame k shows the first ends[k] points, evenly thinned out for long series
+        n_frames = min(len(actual), max_frames)
+        ends = np.unique(np.linspace(0, len(actual), n_frames + 1).round().astype(int))
+
         #sets uo the figure for animation
-        fig, ax = plt.subplots()
-        x = list(range(len(actual)))
+        fig = _new_figure((6.4, 4.8), show)
+        ax = fig.add_subplot()
         ax.set_xlim(0, len(actual))
-        ax.set_ylim(min(min(actual), min(predicted)), max(max(actual), max(predicted)))
+        ax.set_ylim(min(actual.min(), predicted.min()), max(actual.max(), predicted.max()))
         ax.set_title("Actual vs Predicted Over Time")
         ax.set_xlabel("Time")
         ax.set_ylabel("Value")
@@ -60,39 +131,42 @@ class Visualizer:
         line_predicted, = ax.plot([], [], label="Predicted", color="orange")
         ax.legend()
 
-    
         def init():
             """initializer for animation """
-            line_actual.set_data([], [])
-            line_predicted.set_data([], [])
+            line_actual.set_data(x[:0], actual[:0])
+            line_predicted.set_data(x[:0], predicted[:0])
             return line_actual, line_predicted
 
-
-        
-        def update(frame):
-            """Updates the function for the frame """
-            line_actual.set_data(x[:frame], actual[:frame])
-            line_predicted.set_data(x[:frame], predicted[:frame])
+        def update(end):
+            """Updates the function for the frame, slicing arrays gives views so nothing is copied"""
+            line_actual.set_data(x[:end], actual[:end])
+            line_predicted.set_data(x[:end], predicted[:end])
             return line_actual, line_predicted
 
-
         ani = FuncAnimation(
             fig,
             update,
-            frames=len(actual) + 1,
+            frames=ends,
             init_func=init,
-            interval=100,
+            interval=1000 / fps,
             blit=True,
             repeat=False
         )
 
-        plt.show()
+        if output is not None:
+            ani.save(output, writer=writer)
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show()
+            return None
+        Visualizer.close_figure(fig)
+        return ani
 
 
     @staticmethod
-    def plot_clusters(data, labels, show: bool = True):
-        """Plot clustered data with different color for each."""
-        if not data or not labels:
+    def clusters_figure(data, labels, interactive: bool = False) -> Figure:
+        """Build the scatter figure of the clustered data"""
+        if len(data) == 0 or len(labels) == 0:
             raise ValueError("Input lists cannot be empty")
 
         # Check if data is 1D or 2D and set up x and y 
@@ -104,31 +178,128 @@ class Visualizer:
             y_data = [d[1] for d in data]
 
         #scatter plot if clusters
-        plt.figure(figsize=(10, 6))
-        plt.scatter(x_data, y_data, c=labels, cmap='viridis', label="Clusters")
-        plt.xlabel('Feature 1')
-        plt.ylabel('Feature 2')
-        plt.title('Clustered data')
-        plt.legend()
-        plt.show()
+        fig = _new_figure((10, 6), interactive)
+        ax = fig.add_subplot()
+        ax.scatter(x_data, y_data, c=labels, cmap='viridis', label="Clusters")
+        ax.set_xlabel('Feature 1')
+        ax.set_ylabel('Feature 2')
+        ax.set_title('Clustered data')
+        ax.legend()
+        return fig
 
+    @staticmethod
+    def plot_clusters(data, labels, show: bool = True,
+                      output: Union[str, BinaryIO, None] = None, fmt: Optional[str] = None) -> Optional[Figure]:
+        """Plot clustered data with different color for each."""
+        fig = Visualizer.clusters_figure(data, labels, interactive=show)
+        return Visualizer._finish(fig, show, output, fmt)
 
     @staticmethod
-    def plot_anomalies(time_series: List[float], anomalies: List[bool], show: bool = True) -> None:
-        """Plot time series with detected anomalies"""
-        if not time_series or not anomalies:
+    def anomalies_figure(time_series, anomalies, interactive: bool = False,
+                         max_points: Optional[int] = DEFAULT_MAX_POINTS) -> Figure:
+        """Build the time series figure with the anomalies marked
+
+        Series longer than max_points are thinned with LTTB but flagged points are always kept.
+        """
+        if len(time_series) == 0 or len(anomalies) == 0:
             raise ValueError("Input lists are not allowed to be empty")
+        time_series = np.asarray(time_series, dtype=float)
+        anomalies = np.asarray(anomalies, dtype=bool)
+
+        idx = downsample_indices(time_series, max_points, keep=anomalies)
+        flagged = np.flatnonzero(anomalies)
+
+        fig = _new_figure((10, 6), interactive)
+        ax = fig.add_subplot()
+        ax.plot(idx, time_series[idx], label='Time Series')
+        # Mark every anomaly
+        ax.plot(flagged, time_series[flagged], 'ro', label='Anomales')
+        ax.set_xlabel('Time')
+        ax.set_ylabel('Normalized Value')
+        ax.set_title('Anomaly Detection in Time Series')
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        return fig
+
+    @staticmethod
+    def plot_anomalies(time_series: List[float], anomalies: List[bool], show: bool = True,
+                       output: Union[str, BinaryIO, None] = None, fmt: Optional[str] = None,
+                       max_points: Optional[int] = DEFAULT_MAX_POINTS) -> Optional[Figure]:
+        """Plot time series with detected anomalies"""
+        fig = Visualizer.anomalies_figure(time_series, anomalies, interactive=show, max_points=max_points)
+        return Visualizer._finish(fig, show, output, fmt)
+
+    @staticmethod
+    def _finish(fig: Figure, show: bool, output: Union[str, BinaryIO, None], fmt: Optional[str]) -> Optional[Figure]:
+        """Common tail of the plot_* methods
+
+        output (a path or a binary buffer) gets the rendered figure in fmt, show opens the window.
+        With show=False and no output the headless Figure is returned for the caller to use.
+        """
+        if output is not None:
+            Visualizer.save_figure(fig, output, fmt, close=not show)
+        if show:
+            import matplotlib.pyplot as plt
+            plt.show()
+            return None
+        return None if output is not None else fig
+
+    @staticmethod
+    def save_figure(fig: Figure, output: Union[str, BinaryIO], fmt: Optional[str] = None,
+                    dpi: int = 100, close: bool = True) -> None:
+        """Write a figure to a path or buffer, fmt defaults to the file extension or png"""
+        if fmt is None:
+            ext = os.path.splitext(output)[1].lstrip(".").lower() if isinstance(output, str) else ""
+            fmt = ext or "png"
+        fmt = fmt.lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}', use one of {sorted(EXPORT_FORMATS)}")
+        try:
+            fig.savefig(output, format=fmt, dpi=dpi)
+        finally:
+            if close:
+                Visualizer.close_figure(fig)
+
+    @staticmethod
+    def close_figure(fig: Figure) -> None:
+        """Release a figure, only pyplot figures are registered anywhere that needs closing"""
+        if fig.canvas.manager is not None:
+            import matplotlib.pyplot as plt
+            plt.close(fig)
+
+    @staticmethod
+    def figure_to_png(fig: Figure, dpi: int = 100) -> bytes:
+        """Render a figure into PNG bytes in memory and close it"""
+        buffer = io.BytesIO()
+        Visualizer.save_figure(fig, buffer, "png", dpi=dpi)
+        return buffer.getvalue()
+
+    @staticmethod
+    def export_many(tasks: Sequence[Dict[str, object]], workers: Optional[int] = None) -> List[str]:
+        """Render many plots headless in parallel worker processes
+
+        Every task is a dict with kind ("trend", "clusters" or "anomalies"), args (the
+        positional arguments of the matching plot_* method), output (file path) and an
+        optional fmt. Returns the written paths in task order.
+        """
+        if workers == 1:
+            return [_render_task(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_render_task, tasks))
+
+
+_PLOTTERS = {
+    "trend": Visualizer.plot_trend,
+    "clusters": Visualizer.plot_clusters,
+    "anomalies": Visualizer.plot_anomalies,
+}
 
 
-        
-        plt.figure(figsize=(10, 6))
-        plt.plot(time_series, label='Time Series')
-        # Mark anomalies (non-anomalies shown as NaN)
-        plt.plot(np.where(anomalies, time_series, np.nan),'ro', label='Anomales')
-        plt.xlabel('Time')
-        plt.ylabel('Normalized Value')
-        plt.title('Anomaly Detection in Time Series')
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.show()
+def _render_task(task: Dict[str, object]) -> str:
+    """Worker side of export_many: draw one plot straight to its file"""
+    plotter = _PLOTTERS.get(task["kind"])
+    if plotter is None:
+        raise ValueError(f"Unknown plot kind '{task['kind']}', use one of {sorted(_PLOTTERS)}")
+    plotter(*task["args"], show=False, output=task["output"], fmt=task.get("fmt"))
+    return task["output"]
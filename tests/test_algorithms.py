@@ -2,7 +2,9 @@ import unittest
 
 import numpy as np
 
-from src.algorithms import CustomTemperaturePredictor, detect_anomalies, custom_clustering
+from unittest import mock
+
+from src.algorithms import CustomTemperaturePredictor, detect_anomalies, custom_clustering, fit_batched, CustomKMeans, OnlineAnomalyDetector, detect_anomalies_grid, RollingMedian, rolling_median
 
 class TestAlgorithms(unittest.TestCase):
     """Test for our custom climate algorithm"""
@@ -19,12 +21,155 @@ class TestAlgorithms(unittest.TestCase):
         # Check that we got as many predictions as target value
         self.assertEqual(len(predictions), len(self.y))
 
+    def test_normal_solver_exact_fit(self):
+        '''closed form solver recovers the exact line'''
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(50, 2))
+        y = X @ np.array([1.5, -2.0]) + 0.5
+        model = CustomTemperaturePredictor(solver="normal").fit(X, y)
+        np.testing.assert_allclose(model.weights, [1.5, -2.0])
+        self.assertAlmostEqual(model.bias, 0.5)
+        self.assertEqual(model.n_iter_, 0)
+
+    def test_normal_solver_singular_features(self):
+        '''collinear features fall back to least squares and still fit'''
+        model = CustomTemperaturePredictor(solver="normal").fit(self.X, self.y)
+        np.testing.assert_allclose(model.predict(self.X), self.y)
+
+    def test_gradient_descent_early_stop(self):
+        '''with a tolerance we stop before n_iterations and land near the optimum'''
+        X = np.array([[-1.0], [0.0], [1.0]])
+        y = np.array([1.0, 2.0, 3.0])
+        model = CustomTemperaturePredictor(learning_rate=0.5, n_iterations=10000, tol=1e-8).fit(X, y)
+        self.assertLess(model.n_iter_, 10000)
+        np.testing.assert_allclose(model.predict(X), y, atol=1e-6)
+
+    def test_gradient_descent_warm_start(self):
+        '''warm start continues from the previous weights instead of zeros'''
+        rng = np.random.default_rng(1)
+        X = rng.normal(size=(100, 2))
+        y = X @ np.array([1.0, -1.0]) + 0.2
+        cold = CustomTemperaturePredictor(learning_rate=0.1, n_iterations=20).fit(X, y)
+        warm = CustomTemperaturePredictor(learning_rate=0.1, n_iterations=20, warm_start=True).fit(X, y)
+        first = warm.weights.copy()
+        warm.fit(X, y)
+        np.testing.assert_allclose(first, cold.weights)
+        self.assertLess(np.abs(warm.weights - [1.0, -1.0]).max(), np.abs(first - [1.0, -1.0]).max())
+
+    def test_n_iter_only_after_fit(self):
+        '''n_iter_ is a fitted attribute, check_is_fitted fails before fit and passes after'''
+        from sklearn.exceptions import NotFittedError
+        from sklearn.utils.validation import check_is_fitted
+        model = CustomTemperaturePredictor(solver="normal")
+        self.assertFalse(hasattr(model, "n_iter_"))
+        with self.assertRaises(NotFittedError):
+            check_is_fitted(model)
+        check_is_fitted(model.fit(self.X, self.y))
+        self.assertEqual(fit_batched([self.X], [self.y])[0].n_iter_, 0)
+
+    def test_unknown_solver(self):
+        '''unknown solver names are rejected'''
+        with self.assertRaises(ValueError):
+            CustomTemperaturePredictor(solver="magic").fit(self.X, self.y)
+
+    def test_fit_batched_matches_single_fits(self):
+        '''ragged series fitted together give the same models as fitting one by one'''
+        rng = np.random.default_rng(1)
+        X_list = [rng.normal(size=(n, 2)) for n in (20, 35, 8)]
+        y_list = [x @ rng.normal(size=2) + rng.normal() for x in X_list]
+        models = fit_batched(X_list, y_list)
+        self.assertEqual(len(models), 3)
+        for model, x, y in zip(models, X_list, y_list):
+            single = CustomTemperaturePredictor(solver="normal").fit(x, y)
+            np.testing.assert_allclose(model.weights, single.weights)
+            self.assertAlmostEqual(model.bias, single.bias)
+
+    def test_fit_batched_skips_nan_series(self):
+        '''a series with NaN stays untrained while the others fit'''
+        X = np.array([[[0.0], [1.0], [2.0]], [[0.0], [np.nan], [2.0]]])
+        y = np.array([[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]])
+        models = fit_batched(X, y)
+        np.testing.assert_allclose(models[0].predict(X[0]), y[0])
+        self.assertIsNone(models[1].weights)
+
     def test_custom_clustering(self):
         '''testing our clustering function using 2 clusters'''
         labels = custom_clustering(self.X, n_clusters=2)
         #  label for every sample
         self.assertEqual(len(labels), len(self.X))
 
+    def test_kmeans_finds_separated_blobs(self):
+        '''three far apart blobs end up in three clusters with small chunks'''
+        rng = np.random.default_rng(2)
+        centers = np.array([[0, 0], [10, 10], [-10, 10]])
+        data = np.concatenate([c + rng.normal(scale=0.5, size=(100, 2)) for c in centers])
+        km = CustomKMeans(n_clusters=3, chunk_size=7, random_state=0).fit(data)
+        for i in range(3):
+            self.assertEqual(len(set(km.labels_[i * 100:(i + 1) * 100])), 1)
+        self.assertEqual(len(set(km.labels_)), 3)
+        self.assertLess(km.n_iter_, km.max_iter)
+        np.testing.assert_array_equal(km.predict(data), km.labels_)
+
+    def test_kmeans_minibatch(self):
+        '''mini-batch mode still separates clear blobs'''
+        rng = np.random.default_rng(3)
+        data = np.concatenate([rng.normal(size=(200, 2)), 20 + rng.normal(size=(200, 2))])
+        km = CustomKMeans(n_clusters=2, batch_size=32, random_state=0).fit(data)
+        self.assertNotEqual(km.labels_[0], km.labels_[-1])
+
+    def test_kmeans_duplicates_no_nan(self):
+        '''duplicate points would leave empty clusters, the repair keeps centroids finite'''
+        data = np.array([[1.0, 1.0]] * 5 + [[2.0, 2.0]])
+        km = CustomKMeans(n_clusters=3, random_state=0).fit(data)
+        self.assertFalse(np.isnan(km.cluster_centers_).any())
+
+    def test_kmeans_too_many_clusters(self):
+        '''asking for more clusters than samples is an error'''
+        with self.assertRaises(ValueError):
+            custom_clustering(self.X, n_clusters=5)
+
+    def test_kmeans_restarts_keep_best(self):
+        '''the kept run is the lowest inertia restart and equals the single fit with that seed'''
+        rng = np.random.default_rng(9)
+        data = np.concatenate([c + rng.normal(size=(60, 2)) for c in ([0, 0], [4, 0], [2, 4], [8, 8])])
+        km = CustomKMeans(n_clusters=4, n_init=6, random_state=1).fit(data)
+        self.assertEqual(len(km.restart_inertias_), 6)
+        self.assertEqual(km.inertia_, min(km.restart_inertias_))
+        best = int(np.argmin(km.restart_inertias_))
+        self.assertEqual(km.n_iter_, km.restart_n_iters_[best])
+        seed = np.random.SeedSequence(1).spawn(6)[best]
+        single = CustomKMeans(n_clusters=4, random_state=seed).fit(data)
+        np.testing.assert_array_equal(single.labels_, km.labels_)
+        self.assertEqual(single.inertia_, km.inertia_)
+
+    def test_kmeans_restarts_deterministic_across_workers(self):
+        '''threads or not, the same random_state gives the same clustering'''
+        rng = np.random.default_rng(10)
+        data = rng.normal(size=(500, 3))
+        serial = CustomKMeans(n_clusters=5, n_init=4, n_jobs=1, random_state=3).fit(data)
+        threaded = CustomKMeans(n_clusters=5, n_init=4, n_jobs=4, random_state=3).fit(data)
+        np.testing.assert_array_equal(serial.cluster_centers_, threaded.cluster_centers_)
+        self.assertEqual(serial.restart_inertias_, threaded.restart_inertias_)
+        with self.assertRaises(ValueError):
+            CustomKMeans(n_init=0).fit(data)
+
+    def test_kmeans_restarts_serial_by_default(self):
+        '''no threads unless asked for, the callers already run inside worker pools'''
+        data = np.random.default_rng(12).normal(size=(200, 2))
+        with mock.patch("src.algorithms.ThreadPoolExecutor") as pool:
+            custom_clustering(data, n_clusters=3)
+            CustomKMeans(n_clusters=3, n_init=3).fit(data)
+        pool.assert_not_called()
+
+    def test_custom_clustering_full_output(self):
+        '''full output gives labels, centroids, inertia and iterations, repeat calls agree'''
+        labels, centroids, inertia, n_iter = custom_clustering(self.X, n_clusters=2, full_output=True)
+        self.assertEqual(centroids.shape, (2, 2))
+        self.assertGreaterEqual(n_iter, 1)
+        expected = sum(np.min(((x - centroids) ** 2).sum(axis=1)) for x in self.X)
+        self.assertAlmostEqual(inertia, expected)
+        np.testing.assert_array_equal(custom_clustering(self.X, n_clusters=2), labels)
+
     def test_anomaly_detection(self):
         '''creates a simple time series with anomaly'''
         ts = np.array([1, 1, 1, 10, 1, 1, 1])
@@ -32,6 +177,115 @@ class TestAlgorithms(unittest.TestCase):
         # at least one anomely detected
         self.assertIn(True, anomalies)
 
+    def test_online_detector_matches_batch(self):
+        '''replaying a series through the online detector gives the detect_anomalies mask'''
+        rng = np.random.default_rng(4)
+        ts = rng.normal(size=500)
+        ts[[50, 300]] += 8
+        detector = OnlineAnomalyDetector(window_size=5, threshold=1.5)
+        emitted = np.concatenate([detector.extend(ts[:123]), detector.extend(ts[123:])])
+        expected = detect_anomalies(ts, window_size=5, threshold=1.5)
+        np.testing.assert_array_equal(detector.anomalies(), expected)
+        self.assertEqual(len(emitted), len(ts))
+        self.assertAlmostEqual(detector.std, np.std(ts))
+
+    def test_online_detector_waits_for_window(self):
+        '''no flags come out until the first window is full, then the whole window does'''
+        detector = OnlineAnomalyDetector(window_size=3)
+        self.assertEqual(len(detector.update(1.0)), 0)
+        self.assertEqual(len(detector.update(2.0)), 0)
+        self.assertEqual(len(detector.update(3.0)), 3)
+        self.assertEqual(len(detector.update(4.0)), 1)
+
+    def test_rolling_median_matches_numpy(self):
+        '''the two heap window gives np.median of every trailing window, ties and even windows included'''
+        rng = np.random.default_rng(7)
+        ts = np.round(rng.normal(size=300), 1)
+        for window in (1, 2, 5, 40):
+            expected = np.array([np.median(ts[max(i - window + 1, 0):i + 1]) for i in range(len(ts))])
+            expected[:window - 1] = expected[window - 1]
+            np.testing.assert_allclose(rolling_median(ts, window), expected)
+
+    def test_rolling_median_window(self):
+        '''values can be added and removed in any order'''
+        window = RollingMedian()
+        for value in (5, 1, 9, 3):
+            window.add(value)
+        self.assertEqual(window.median(), 4.0)
+        window.remove(9)
+        window.remove(1)
+        self.assertEqual(window.median(), 4.0)
+        self.assertEqual(len(window), 2)
+        window.remove(5)
+        self.assertEqual(window.median(), 3.0)
+
+    def test_robust_anomalies_not_masked_by_outliers(self):
+        '''big outliers inflate the std so the mean mode misses the small one, the median mode does not'''
+        rng = np.random.default_rng(8)
+        ts = rng.normal(scale=0.1, size=200)
+        ts[[20, 60, 100]] += 50
+        ts[150] += 2
+        mean_mask = detect_anomalies(ts, window_size=5, threshold=3.0)
+        robust_mask = detect_anomalies(ts, window_size=5, threshold=3.0, method="median")
+        self.assertEqual(robust_mask.dtype, bool)
+        self.assertEqual(robust_mask.shape, ts.shape)
+        self.assertFalse(mean_mask[150])
+        self.assertTrue(robust_mask[[20, 60, 100, 150]].all())
+        self.assertLess(robust_mask.sum(), 10)
+
+    def test_robust_anomalies_false_positive_rate(self):
+        '''plain gaussian noise is flagged about as rarely as a z-score test would flag it'''
+        ts = np.random.default_rng(11).normal(size=20000)
+        for window, threshold, limit in ((3, 2.0, 0.06), (5, 2.0, 0.06), (3, 3.0, 0.01), (10, 3.0, 0.01)):
+            rate = detect_anomalies(ts, window_size=window, threshold=threshold, method="median").mean()
+            self.assertLess(rate, limit, (window, threshold))
+
+    def test_robust_anomalies_mostly_constant(self):
+        '''a zero MAD falls back to the mean absolute deviation, a constant series flags nothing'''
+        ts = np.full(100, 5.0)
+        ts[[10, 40, 41, 70]] = [5.1, 4.9, 5.05, 30.0]
+        mask = detect_anomalies(ts, window_size=5, threshold=3.0, method="median")
+        np.testing.assert_array_equal(np.flatnonzero(mask), [70])
+        self.assertFalse(detect_anomalies(np.full(50, 2.0), window_size=5, method="median").any())
+
+    def test_robust_anomalies_short_series_and_bad_method(self):
+        '''a series shorter than the window has no flags, unknown modes raise'''
+        self.assertFalse(detect_anomalies(np.array([1.0, 9.0]), window_size=3, method="median").any())
+        with self.assertRaises(ValueError):
+            detect_anomalies(np.ones(5), method="mode")
+
+    def test_anomaly_grid_matches_single_calls(self):
+        '''every cell of the grid is the mask of the matching detect_anomalies call'''
+        rng = np.random.default_rng(5)
+        series = rng.normal(size=(3, 200)) * 2 + 50
+        series[:, 120] += 15
+        windows, thresholds = [1, 3, 12], [0.5, 1.5, 3.0]
+        grid = detect_anomalies_grid(series, windows, thresholds)
+        self.assertEqual(grid.shape, (3, 3, 3, 200))
+        for s in range(3):
+            for i, window in enumerate(windows):
+                for j, threshold in enumerate(thresholds):
+                    np.testing.assert_array_equal(grid[s, i, j], detect_anomalies(series[s], window, threshold))
+
+    def test_anomaly_grid_ragged_and_packed(self):
+        '''shorter series are padded without flags and packbits round trips'''
+        rng = np.random.default_rng(6)
+        long, short = rng.normal(size=90), rng.normal(size=40)
+        packed = detect_anomalies_grid([long, short, short[:2]], [3, 5], [1.0], packbits=True)
+        self.assertEqual(packed.dtype, np.uint8)
+        grid = np.unpackbits(packed, axis=-1, count=90).astype(bool)
+        np.testing.assert_array_equal(grid[1, :, :, :40], detect_anomalies_grid(short, [3, 5], [1.0]))
+        self.assertFalse(grid[1, :, :, 40:].any())
+        # Two samples cannot fill a window of 3
+        self.assertFalse(grid[2].any())
+
+    def test_anomaly_grid_window_longer_than_series(self):
+        '''windows far longer than the series give an all False mask instead of an index error'''
+        self.assertFalse(detect_anomalies_grid([1.0], [4], [1.0]).any())
+        grid = detect_anomalies_grid([[1.0, 5.0], [2.0, 3.0, 9.0, 1.0]], [2, 6, 50], [0.5])
+        self.assertEqual(grid.shape, (2, 3, 1, 4))
+        self.assertFalse(grid[:, 1:].any())
+
 if __name__ == '__main__':
     '''runs all the tests'''
     unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+from src import main
+from src.batch import analyze_file, run_batch
+from src.catalog import DataCatalog
+
+class TestBatch(unittest.TestCase):
+    """Test suite for the parallel batch runner"""
+    def setUp(self):
+        """Parsed data goes to a temp cache instead of the repo's .data_cache"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        # Same for the catalog index behind detect_target_column
+        catalog = DataCatalog(main.DATA_DIR, index_path=os.path.join(self.cache_dir, "catalog.json"))
+        patcher = mock.patch.object(main, "_catalog", catalog)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_analyze_file_all_actions(self):
+        """one record per action with the action specific fields"""
+        records = analyze_file("precipitation/precipAsiaNOAA.csv", ["predict", "cluster", "anomalies"],
+                               cache_dir=self.cache_dir)
+        self.assertEqual([r["action"] for r in records], ["predict", "cluster", "anomalies"])
+        self.assertTrue(all(r["status"] == "ok" for r in records))
+        self.assertIn("rmse", records[0])
+        self.assertEqual(sum(records[1]["cluster_sizes"]), records[1]["n_samples"])
+        self.assertEqual(len(records[1]["centroids"]), 3)
+        self.assertGreater(records[1]["inertia"], 0)
+        self.assertEqual(records[2]["n_anomalies"], len(records[2]["anomaly_indices"]))
+
+    def test_run_batch_writes_json_lines(self):
+        """every file x action becomes one JSON line in input order"""
+        files = ["precipitation/precipAsiaNOAA.csv", "temperature_anomaly/tempAsiaNOAA.csv"]
+        out = io.StringIO()
+        written = run_batch(files, ["anomalies"], workers=2, output=out, cache_dir=self.cache_dir)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(written, 2)
+        self.assertEqual([line["file"] for line in lines], files)
+        entries = [name for name in os.listdir(self.cache_dir) if os.path.isdir(os.path.join(self.cache_dir, name))]
+        self.assertEqual(len(entries), 2)
+
+    def test_plots_exported_headless(self):
+        """with a plot dir every action writes its figure file"""
+        plot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, plot_dir)
+        records = analyze_file("temperature_anomaly/tempAsiaNOAA.csv", ["predict", "cluster", "anomalies"],
+                               plot_dir=plot_dir, plot_format="svg", cache_dir=self.cache_dir)
+        for record in records:
+            self.assertTrue(record["plot"].endswith(".svg"))
+            self.assertTrue(os.path.exists(record["plot"]))
+
+if __name__ == '__main__':
+    unittest.main()
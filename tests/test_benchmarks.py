@@ -0,0 +1,38 @@
+import unittest
+import os
+import tempfile
+
+from benchmarks.synthetic import generate_noaa_csv
+from benchmarks.run_benchmarks import compare, run
+from src.data_processor import DataProcessor
+
+class TestBenchmarks(unittest.TestCase):
+    """Test suite for the synthetic data generator and the benchmark report"""
+    def test_synthetic_file_loads_like_noaa(self):
+        """preamble, year/month columns and -9999 sentinels that clean_data drops"""
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        generate_noaa_csv(path, 2400, missing_rate=0.05)
+        proc = DataProcessor(path, "anomaly")
+        df = proc.load_data()
+        self.assertEqual(len(df), 2400)
+        self.assertEqual(proc.metadata["missing"], -9999.0)
+        proc.clean_data()
+        self.assertLess(len(proc.df), 2400)
+        X, y = proc.get_features_and_target()
+        self.assertEqual(X.shape[1], 2)
+        self.assertEqual(y.dtype.kind, "f")
+
+    def test_report_and_compare(self):
+        """a tiny run reports every wanted stage and a slower copy is flagged"""
+        report = run([500], ["load_data", "fit", "detect_anomalies"])
+        self.assertEqual([r["stage"] for r in report["results"]], ["load_data", "fit", "detect_anomalies"])
+        self.assertEqual(compare(report, report), [])
+
+        slower = {"results": [dict(r, seconds=r["seconds"] * 2) for r in report["results"]]}
+        regressions = compare(slower, report, tolerance=0.5)
+        self.assertEqual({r["metric"] for r in regressions}, {"seconds"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import tempfile
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from unittest import mock
+
+from src.cache import DatasetCache
+from src.data_processor import DataProcessor
+
+NOAA_CSV = """# Title: Global Precipitation
+# Units: Millimeters
+# Missing: -9999
+Year,Value
+2000,1.5
+2001,2.5
+2002,-9999
+"""
+
+class TestDatasetCache(unittest.TestCase):
+    """Test suite for the on-disk parse cache"""
+    def setUp(self):
+        """Fresh cache dir and source CSV for every test"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.csv_path = os.path.join(self.tmp_dir, "precip.csv")
+        with open(self.csv_path, "w") as f:
+            f.write(NOAA_CSV)
+        self.cache = DatasetCache(os.path.join(self.tmp_dir, "cache"))
+
+    def test_second_load_hits_cache(self):
+        """The second processor reads the cached columns, not the CSV"""
+        first = DataProcessor(self.csv_path, "precipitation", cache=self.cache).load_data()
+        self.assertIsNotNone(self.cache.get(self.csv_path))
+
+        proc = DataProcessor(self.csv_path, "precipitation", cache=self.cache)
+        proc._read_fast = None  # would blow up if the CSV were parsed again
+        second = proc.load_data()
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(proc.metadata["units"], "Millimeters")
+
+        # Cleaning must work on the cached columns
+        proc.clean_data()
+        self.assertEqual(len(proc.df), 2)
+
+    def test_changed_file_invalidates(self):
+        """Appending a row changes the size so the entry is dropped"""
+        DataProcessor(self.csv_path, "precipitation", cache=self.cache).load_data()
+        with open(self.csv_path, "a") as f:
+            f.write("2003,3.5\n")
+        self.assertIsNone(self.cache.get(self.csv_path))
+        df = DataProcessor(self.csv_path, "precipitation", cache=self.cache).load_data()
+        self.assertEqual(len(df), 4)
+
+    def test_touched_file_still_hits(self):
+        """Only the mtime changed so the content hash keeps the entry valid"""
+        DataProcessor(self.csv_path, "precipitation", cache=self.cache).load_data()
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNotNone(self.cache.get(self.csv_path))
+
+    def test_eviction_respects_budget(self):
+        """The oldest entries go once the size budget is exceeded"""
+        cache = DatasetCache(os.path.join(self.tmp_dir, "small"), max_bytes=100)
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.tmp_dir, f"data{i}.csv")
+            pd.DataFrame({"year": np.arange(4), "value": np.arange(4.0)}).to_csv(path, index=False)
+            DataProcessor(path, "value", cache=cache).load_data()
+            paths.append(path)
+        self.assertLessEqual(cache.total_bytes(), 100)
+        self.assertIsNone(cache.get(paths[0]))
+        self.assertIsNotNone(cache.get(paths[-1]))
+
+    def test_hit_only_bumps_recency(self):
+        """a hit never rewrites the manifest and a recently read entry outlives older ones"""
+        cache = DatasetCache(os.path.join(self.tmp_dir, "lru"), max_bytes=10**6)
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.tmp_dir, f"lru{i}.csv")
+            pd.DataFrame({"year": np.arange(4), "value": np.arange(4.0)}).to_csv(path, index=False)
+            DataProcessor(path, "value", cache=cache).load_data()
+            paths.append(path)
+        with mock.patch.object(DatasetCache, "_write_manifest", side_effect=AssertionError("rewritten")):
+            self.assertIsNotNone(cache.get(paths[0]))
+        cache.max_bytes = 2 * 64
+        cache.evict()
+        self.assertIsNotNone(cache.get(paths[0]))
+        self.assertIsNone(cache.get(paths[1]))
+
+    def test_clear_keeps_other_state(self):
+        """clear drops the entries but not the models / catalog sharing the directory"""
+        DataProcessor(self.csv_path, "precipitation", cache=self.cache).load_data()
+        os.makedirs(os.path.join(self.cache.cache_dir, "models"))
+        with open(os.path.join(self.cache.cache_dir, "catalog.json"), "w") as f:
+            f.write("{}")
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.csv_path))
+        self.assertEqual(sorted(os.listdir(self.cache.cache_dir)), ["catalog.json", "models"])
+
+if __name__ == '__main__':
+    unittest.main()
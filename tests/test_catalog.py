@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+
+from unittest import mock
+
+from src.catalog import DataCatalog, guess_target_column
+
+PRECIP_CSV = """# Title: Global Precipitation
+# Units: Millimeters
+# Missing: -9999
+Year,Value
+2000,1.5
+2001,2.5
+2002,-9999
+"""
+
+class TestDataCatalog(unittest.TestCase):
+    """Test suite for the persistent index of the data directory"""
+    def setUp(self):
+        """A small data/ tree and an index file of its own"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(os.path.join(self.data_dir, "precipitation"))
+        self._write("precipitation/precipGlobal.csv", PRECIP_CSV)
+        self.index_path = os.path.join(self.tmp_dir, "catalog.json")
+
+    def _write(self, rel_path, text):
+        """Write a file under the data dir"""
+        with open(os.path.join(self.data_dir, rel_path), "w") as f:
+            f.write(text)
+
+    def _catalog(self):
+        """Catalog that checks the disk on every lookup"""
+        return DataCatalog(self.data_dir, index_path=self.index_path, refresh_interval=0)
+
+    def test_entry_metadata(self):
+        """the entry holds the preamble, target, row count and year range"""
+        entry = self._catalog().get("precipitation/precipGlobal.csv")
+        self.assertEqual(entry["title"], "Global Precipitation")
+        self.assertEqual(entry["units"], "Millimeters")
+        self.assertEqual(entry["missing"], -9999.0)
+        self.assertEqual(entry["target_column"], "precipitation")
+        self.assertEqual(entry["rows"], 3)
+        self.assertEqual((entry["year_min"], entry["year_max"]), (2000, 2002))
+
+    def test_index_persists_without_rescanning(self):
+        """a second catalog reads the stored index instead of parsing the files again"""
+        self._catalog().refresh()
+        catalog = self._catalog()
+        with mock.patch.object(DataCatalog, "_scan", side_effect=AssertionError("rescanned")):
+            self.assertEqual(catalog.files(), [os.path.join("precipitation", "precipGlobal.csv")])
+
+    def test_incremental_refresh(self):
+        """new, changed and deleted files are picked up, unchanged ones are not re-read"""
+        catalog = self._catalog()
+        catalog.refresh()
+        self._write("precipitation/precipAsia.csv", PRECIP_CSV)
+        with open(os.path.join(self.data_dir, "precipitation/precipGlobal.csv"), "a") as f:
+            f.write("2003,4.0\n")
+
+        with mock.patch.object(DataCatalog, "_scan", wraps=catalog._scan) as scan:
+            self.assertTrue(catalog.refresh())
+        self.assertEqual(sorted(call.args[0] for call in scan.call_args_list),
+                         [os.path.join("precipitation", "precipAsia.csv"), os.path.join("precipitation", "precipGlobal.csv")])
+        self.assertEqual(catalog.get("precipitation/precipGlobal.csv")["rows"], 4)
+
+        os.remove(os.path.join(self.data_dir, "precipitation/precipAsia.csv"))
+        self.assertEqual(len(catalog.files()), 1)
+        self.assertFalse(catalog.refresh())
+
+    def test_refresh_interval(self):
+        """within the interval lookups do not touch the disk at all"""
+        catalog = DataCatalog(self.data_dir, index_path=self.index_path, refresh_interval=3600)
+        catalog.files()
+        self._write("precipitation/precipAsia.csv", PRECIP_CSV)
+        self.assertEqual(len(catalog.files()), 1)
+        catalog.refresh(force=True)
+        self.assertEqual(len(catalog.files()), 2)
+
+    def test_lookups_do_not_wait_for_a_rescan(self):
+        """while one thread re-parses a changed file the others answer from the previous entries"""
+        catalog = DataCatalog(self.data_dir, index_path=self.index_path, refresh_interval=3600)
+        catalog.files()
+        self._write("precipitation/precipAsia.csv", PRECIP_CSV)
+        scanning, release = threading.Event(), threading.Event()
+        original_scan = catalog._scan
+
+        def slow_scan(rel_path, stat):
+            scanning.set()
+            release.wait(5)
+            return original_scan(rel_path, stat)
+
+        with mock.patch.object(catalog, "_scan", side_effect=slow_scan):
+            worker = threading.Thread(target=catalog.refresh, kwargs={"force": True})
+            worker.start()
+            self.assertTrue(scanning.wait(5))
+            # Answered while the scan is still blocked
+            self.assertEqual(catalog.target_column("precipitation/precipGlobal.csv"), "precipitation")
+            self.assertEqual(len(catalog.files()), 1)
+            release.set()
+            worker.join(5)
+        self.assertEqual(len(catalog.files()), 2)
+
+    def test_unknown_file(self):
+        """files outside the catalog have no entry"""
+        catalog = self._catalog()
+        self.assertIsNone(catalog.get("../secret.csv"))
+        self.assertIsNone(catalog.target_column("missing.csv"))
+
+    def test_guess_target_column(self):
+        """the filename wins, then the column names"""
+        self.assertEqual(guess_target_column("tempAsia.csv", ["year", "value"]), "temperature")
+        self.assertEqual(guess_target_column("data.csv", ["year", "Anomaly_C"]), "Anomaly_C")
+        self.assertIsNone(guess_target_column("data.csv", ["year", "value"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,23 @@
 import unittest
 import os
+import tempfile
+import tracemalloc
 
 import pandas as pd
 import numpy as np
 
-from src.data_processor import DataProcessor
+from benchmarks.synthetic import generate_noaa_csv
+from src.data_processor import DataProcessor, RunningStats, read_noaa_header
+
+NOAA_CSV = """# Title: Asia February - January Average Temperature Anomalies
+# Units: Degrees Celsius
+# Missing: -999
+# Base Period: 1910-2000
+Year,Anomaly
+1979,0.10
+1980,0.08
+1981,0.35
+"""
 
 class TestDataProcessor(unittest.TestCase):
     """ Test suite for the DataProcessor class for datat handling"""
@@ -90,6 +103,155 @@ class TestDataProcessor(unittest.TestCase):
         df = proc.load_data()
         self.assertTrue(df.empty)
 
+    def _write_tmp(self, text):
+        """Write text to a temp CSV and return its path"""
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_read_noaa_header(self):
+        """The preamble is parsed into metadata and counted"""
+        path = self._write_tmp(NOAA_CSV)
+        metadata, n_lines = read_noaa_header(path)
+        self.assertEqual(n_lines, 4)
+        self.assertEqual(metadata["units"], "Degrees Celsius")
+        self.assertEqual(metadata["missing"], -999.0)
+        self.assertEqual(metadata["base_period"], "1910-2000")
+
+    def test_fast_load_matches_python_engine(self):
+        """Fast loader gives the same frame as the python parser and exposes the metadata"""
+        path = self._write_tmp(NOAA_CSV)
+        proc = DataProcessor(path, "anomaly")
+        df = proc.load_data()
+        expected = pd.read_csv(path, engine="python", comment="#")
+        self.assertEqual(df.columns.tolist(), ["year", "anomaly"])
+        np.testing.assert_array_equal(df["anomaly"].values, expected["Anomaly"].values)
+        self.assertEqual(df["year"].dtype, np.int64)
+        self.assertTrue(proc.metadata["title"].startswith("Asia"))
+
+    def test_malformed_file_falls_back(self):
+        """A comment line in the body breaks the fast path but the fallback still loads it"""
+        path = self._write_tmp(NOAA_CSV + "# trailing note\n1982,0.40\n")
+        df = DataProcessor(path, "anomaly").load_data()
+        self.assertEqual(len(df), 4)
+
+    def _synthetic(self, n_rows):
+        """Path of a synthetic NOAA file with -9999 gaps"""
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return generate_noaa_csv(path, n_rows, missing_rate=0.05)
+
+    def test_running_stats_merge(self):
+        """chunked Welford updates give the same mean / std as the whole column"""
+        values = np.random.default_rng(0).normal(5.0, 2.0, size=(1000, 2))
+        stats = RunningStats(2)
+        for part in np.array_split(values, 7):
+            stats.update(part)
+        np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+        np.testing.assert_allclose(stats.std(), values.std(axis=0, ddof=1))
+        self.assertEqual(stats.count, 1000)
+
+    def test_running_stats_covariance(self):
+        """chunked co-moments give the covariance of the whole data and survive a dict round trip"""
+        values = np.random.default_rng(0).normal(size=(500, 3))
+        stats = RunningStats(3, covariance=True)
+        for part in np.array_split(values, 9):
+            stats.update(part)
+        np.testing.assert_allclose(stats.comoment / (stats.count - 1), np.cov(values.T))
+        np.testing.assert_allclose(stats.std(), values.std(axis=0, ddof=1))
+        restored = RunningStats.from_dict(stats.to_dict())
+        np.testing.assert_allclose(restored.copy().comoment, stats.comoment)
+
+    def test_chunked_matches_in_memory(self):
+        """the (X, y) batches concatenate to what the in-memory pipeline gives"""
+        path = self._synthetic(5000)
+        proc = DataProcessor(path, "anomaly")
+        proc.load_data()
+        proc.clean_data()
+        proc.normalize_temperature()
+        X_full, y_full = proc.get_features_and_target()
+
+        chunked = DataProcessor(path, "anomaly")
+        batches = list(chunked.iter_features_and_target(chunksize=700))
+        self.assertTrue(all(len(y) <= 700 for _, y in batches))
+        np.testing.assert_array_equal(np.concatenate([X for X, _ in batches]), X_full)
+        np.testing.assert_allclose(np.concatenate([y for _, y in batches]), y_full)
+        self.assertEqual(chunked.target_stats.count, len(y_full))
+
+    def test_chunked_missing_target(self):
+        """a file without the target column fails loudly instead of yielding nothing"""
+        with self.assertRaises(ValueError):
+            list(DataProcessor("tests/missing_year.csv", "anomaly").iter_features_and_target())
+
+    def test_chunked_memory_independent_of_file_size(self):
+        """peak memory of a chunked pass grows with the chunk, not the file"""
+        def peak(n_rows):
+            path = self._synthetic(n_rows)
+            tracemalloc.start()
+            for _ in DataProcessor(path, "anomaly").iter_features_and_target(chunksize=2000):
+                pass
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        small, large = peak(20_000), peak(200_000)
+        self.assertLess(large, small * 2)
+
+    def test_compact_matches_default(self):
+        """compact mode gives the same numbers in float32 with X and y as views of one block"""
+        path = self._synthetic(3000)
+        default = DataProcessor(path, "anomaly")
+        default.load_data()
+        default.clean_data()
+        default.normalize_temperature()
+        X_full, y_full = default.get_features_and_target()
+
+        compact = DataProcessor(path, "anomaly", compact=True)
+        compact.load_data()
+        df = compact.clean_data()
+        compact.normalize_temperature()
+        X, y = compact.get_features_and_target()
+        self.assertEqual(len(df), len(y_full))
+        self.assertEqual(X.dtype, np.float32)
+        self.assertTrue(np.shares_memory(X, compact.values))
+        self.assertTrue(np.shares_memory(y, compact.values))
+        self.assertTrue(np.shares_memory(df.values, compact.values))
+        np.testing.assert_array_equal(X, X_full)
+        np.testing.assert_allclose(y, y_full, atol=1e-5)
+
+    def test_compact_standardize_in_place(self):
+        """standardize_features scales the block itself in compact mode"""
+        path = self._synthetic(1200)
+        proc = DataProcessor(path, "anomaly", compact=True)
+        proc.load_data()
+        proc.clean_data()
+        X, mean, std = proc.standardize_features()
+        self.assertTrue(np.shares_memory(X, proc.values))
+        np.testing.assert_allclose(X.mean(axis=0), 0.0, atol=1e-4)
+        np.testing.assert_allclose(proc.get_features_and_target()[0], X)
+        self.assertEqual(mean.shape, (2,))
+
+    def test_compact_uses_less_memory(self):
+        """peak memory of the compact pipeline is a fraction of the default one"""
+        path = self._synthetic(400_000)
+
+        def peak(compact):
+            tracemalloc.start()
+            proc = DataProcessor(path, "anomaly", compact=compact)
+            proc.load_data()
+            proc.clean_data()
+            proc.normalize_temperature()
+            proc.standardize_features()
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        default = peak(False)
+        self.assertLess(peak(True) * 2.5, default)
+
 if __name__ == '__main__':
     """Runs all the tests to see if they pass"""
     unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from src.downsample import lttb_indices, downsample_indices
+
+class TestDownsample(unittest.TestCase):
+    """Test suite for the plot downsampling helpers"""
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        """budget is met, ends are kept and a sharp spike survives"""
+        y = np.sin(np.linspace(0, 20, 10000))
+        y[5000] = 10.0
+        idx = lttb_indices(np.arange(len(y)), y, 200)
+        self.assertEqual(len(idx), 200)
+        self.assertEqual(idx[0], 0)
+        self.assertEqual(idx[-1], len(y) - 1)
+        self.assertIn(5000, idx)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+
+    def test_short_series_untouched(self):
+        """nothing to thin when the series fits the budget"""
+        np.testing.assert_array_equal(downsample_indices([1.0, 2.0, 3.0], max_points=10), [0, 1, 2])
+        np.testing.assert_array_equal(downsample_indices(np.ones(50), max_points=None), np.arange(50))
+
+    def test_flagged_points_always_kept(self):
+        """every anomaly index is in the output even beyond the budget"""
+        rng = np.random.default_rng(5)
+        y = rng.normal(size=50000)
+        keep = np.zeros(len(y), dtype=bool)
+        keep[rng.choice(len(y), 300, replace=False)] = True
+        idx = downsample_indices(y, max_points=500, keep=keep)
+        self.assertTrue(set(np.flatnonzero(keep)) <= set(idx))
+        self.assertLessEqual(len(idx), 800)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from unittest import mock
+
+from src.data_processor import DataProcessor
+from src.incremental import IncrementalModel
+from src.predictor import CustomTemperaturePredictor
+
+NOAA_CSV = """# Title: Global Land and Ocean Temperature Anomalies
+# Units: Degrees Celsius
+# Missing: -9999
+Year,Anomaly
+2000,0.40
+2001,0.52
+2002,-9999
+2003,0.61
+2004,0.55
+2005,0.68
+"""
+
+class TestIncrementalModel(unittest.TestCase):
+    """Test suite for incremental statistics and model updates on appended rows"""
+    def setUp(self):
+        """A NOAA file and a state dir of its own"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.csv_path = os.path.join(self.tmp_dir, "tempGlobal.csv")
+        with open(self.csv_path, "w") as f:
+            f.write(NOAA_CSV)
+        self.state_dir = os.path.join(self.tmp_dir, "state")
+
+    def _tracker(self):
+        """Tracker that reads its state from the temp dir"""
+        return IncrementalModel(self.csv_path, "anomaly", state_dir=self.state_dir)
+
+    def _append(self, text):
+        """Append rows to the file"""
+        with open(self.csv_path, "a") as f:
+            f.write(text)
+
+    def _full_pipeline(self):
+        """Stats and model the way the entry points compute them from scratch"""
+        proc = DataProcessor(self.csv_path, "anomaly")
+        proc.load_data()
+        proc.clean_data()
+        raw_y = proc.df["anomaly"].to_numpy().copy()
+        proc.normalize_temperature()
+        X, y = proc.get_features_and_target()
+        X_std = (X - X.mean(axis=0)) / X.std(axis=0)
+        model = CustomTemperaturePredictor(solver="normal").fit(X_std, y)
+        return raw_y, X, X_std, y, model
+
+    def test_first_refresh_matches_full_pipeline(self):
+        """stats and model equal what normalize_temperature + the normal solver give"""
+        tracker = self._tracker()
+        self.assertEqual(tracker.refresh(), 5)
+        raw_y, X, X_std, y, model = self._full_pipeline()
+        stats = tracker.stats()
+        self.assertAlmostEqual(stats["target_mean"], raw_y.mean())
+        self.assertAlmostEqual(stats["target_std"], raw_y.std(ddof=1))
+        np.testing.assert_allclose(tracker.model().weights, model.weights)
+        self.assertAlmostEqual(tracker.model().bias, model.bias)
+        X_t, y_t = tracker.transform(X, raw_y)
+        np.testing.assert_allclose(X_t, X_std)
+        np.testing.assert_allclose(y_t, y)
+
+    def test_stats_before_refresh(self):
+        """stats / model on a fresh tracker read the file first instead of failing"""
+        tracker = self._tracker()
+        self.assertEqual(tracker.stats()["count"], 5)
+        np.testing.assert_allclose(self._tracker().model().weights, self._full_pipeline()[4].weights)
+
+    def test_append_reads_only_new_rows(self):
+        """after an append only the new bytes are parsed and the result matches a full rerun"""
+        self._tracker().refresh()
+        self._append("2006,0.63\n2007,-9999\n2008,0.54\n")
+
+        tracker = self._tracker()
+        with mock.patch.object(IncrementalModel, "_reset", side_effect=AssertionError("full re-read")):
+            self.assertEqual(tracker.refresh(), 2)
+        self.assertEqual(tracker.count, 7)
+        np.testing.assert_allclose(tracker.model().weights, self._full_pipeline()[4].weights)
+        self.assertEqual(tracker.refresh(), 0)
+
+    def test_line_without_newline(self):
+        """an unterminated last line counts now and is not counted twice once completed"""
+        self._append("2006,0.63")
+        tracker = self._tracker()
+        self.assertEqual(tracker.refresh(), 6)
+        self.assertEqual(self._tracker().refresh(), 0)
+        self._append("\n2007,0.70\n")
+        tracker = self._tracker()
+        self.assertEqual(tracker.refresh(), 1)
+        self.assertEqual(tracker.count, 7)
+        np.testing.assert_allclose(tracker.model().weights, self._full_pipeline()[4].weights)
+
+    def test_rewritten_file_rebuilds(self):
+        """a file that changed before the offset is read again from the start"""
+        self._tracker().refresh()
+        with open(self.csv_path, "w") as f:
+            f.write(NOAA_CSV.replace("0.68", "0.99"))
+        tracker = self._tracker()
+        tracker.refresh()
+        self.assertEqual(tracker.count, 5)
+        np.testing.assert_allclose(tracker.model().weights, self._full_pipeline()[4].weights)
+
+    def test_revised_old_row_rebuilds(self):
+        """a same length revision far before the offset is caught, not only changes near the end"""
+        with open(self.csv_path, "w") as f:
+            f.write(NOAA_CSV.split("2000")[0] + "".join(f"{year},0.{year % 90 + 10}\n" for year in range(1000, 2000)))
+        self._tracker().refresh()
+        with open(self.csv_path, "r+") as f:
+            text = f.read()
+            f.seek(0)
+            f.write(text.replace("1001,0.21", "1001,9.21"))
+        tracker = self._tracker()
+        tracker.refresh()
+        self.assertEqual(tracker.count, 1000)
+        self.assertAlmostEqual(tracker.stats()["target_mean"], self._full_pipeline()[0].mean())
+
+if __name__ == "__main__":
+    unittest.main()
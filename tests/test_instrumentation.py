@@ -0,0 +1,70 @@
+import unittest
+import time
+
+from src.instrumentation import NULL_PROFILER, MetricsRegistry, Profiler
+
+class TestInstrumentation(unittest.TestCase):
+    """Test suite for the profiler and the metrics registry"""
+    def test_profiler_records_spans_in_order(self):
+        """every span is recorded and repeated stages are summed in the summary"""
+        profiler = Profiler()
+        with profiler.span("load"):
+            time.sleep(0.01)
+        with profiler.span("fit"):
+            pass
+        with profiler.span("load"):
+            pass
+        self.assertEqual([r[0] for r in profiler.records], ["load", "fit", "load"])
+        summary = profiler.summary()
+        self.assertEqual([s["stage"] for s in summary], ["load", "fit"])
+        self.assertEqual(summary[0]["calls"], 2)
+        self.assertGreaterEqual(summary[0]["seconds"], 0.01)
+        self.assertIn("load", profiler.format_report())
+
+    def test_profiler_memory_peak(self):
+        """with trace_memory the span peak covers what the body allocated"""
+        profiler = Profiler(trace_memory=True)
+        with profiler.span("alloc"):
+            data = bytearray(4 * 2 ** 20)
+        del data
+        self.assertGreaterEqual(profiler.records[0][2], 4 * 2 ** 20)
+        self.assertIn("peak MiB", profiler.format_report())
+
+    def test_span_recorded_when_body_raises(self):
+        """a failing stage still shows up in the records"""
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.span("broken"):
+                raise ValueError("boom")
+        self.assertEqual(profiler.records[0][0], "broken")
+
+    def test_registry_histogram_is_cumulative(self):
+        """buckets count every observation at or below their bound"""
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 5.0):
+            registry.observe("stage", seconds)
+        registry.increment("requests")
+        registry.increment("requests", 2)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot["counters"]["requests"], 3)
+        self.assertEqual(snapshot["latency"]["stage"]["buckets"], {"0.1": 1, "1.0": 2, "+Inf": 3})
+        self.assertAlmostEqual(snapshot["latency"]["stage"]["sum"], 5.55)
+        registry.reset()
+        self.assertEqual(registry.snapshot(), {"counters": {}, "latency": {}})
+
+    def test_profiler_feeds_registry(self):
+        """spans land in the stage.* histograms of the registry"""
+        registry = MetricsRegistry()
+        with Profiler(registry=registry).span("fit"):
+            pass
+        self.assertEqual(registry.snapshot()["latency"]["stage.fit"]["count"], 1)
+
+    def test_null_profiler(self):
+        """the null profiler runs the body and records nothing"""
+        ran = []
+        with NULL_PROFILER.span("anything"):
+            ran.append(True)
+        self.assertEqual(ran, [True])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import threading
+
+from src.jobs import JobManager, JobQueueFull
+
+class TestJobManager(unittest.TestCase):
+    """Test suite for the background job store"""
+    def setUp(self):
+        """A small pool per test"""
+        self.manager = JobManager(max_workers=2, max_jobs=3)
+        self.addCleanup(self.manager.shutdown)
+
+    def test_job_runs_and_reports_progress(self):
+        """progress messages and the result end up on the job"""
+        def work(x, progress):
+            progress("half way")
+            return x * 2
+        job_id = self.manager.submit(work, 21)
+        events, finished = self.manager.wait_for_events(job_id, since=0, timeout=5)
+        while not finished:
+            more, finished = self.manager.wait_for_events(job_id, since=len(events), timeout=5)
+            events += more
+        job = self.manager.get(job_id)
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result, 42)
+        self.assertEqual(events, ["half way"])
+
+    def test_failing_job(self):
+        """an exception marks the job as error with its message"""
+        def boom(progress):
+            raise RuntimeError("bad file")
+        job_id = self.manager.submit(boom)
+        self.manager.wait_for_events(job_id, timeout=5)
+        self.assertEqual(self.manager.get(job_id).status, "error")
+        self.assertEqual(self.manager.get(job_id).error, "bad file")
+
+    def test_store_is_bounded(self):
+        """old finished jobs are forgotten past max_jobs"""
+        ids = []
+        for i in range(5):
+            ids.append(self.manager.submit(lambda progress: None))
+            self.manager.wait_for_events(ids[-1], timeout=5)
+        self.assertIsNone(self.manager.get(ids[0]))
+        self.assertIsNotNone(self.manager.get(ids[-1]))
+
+    def test_pending_jobs_are_capped(self):
+        """past max_pending unfinished jobs submit refuses, a finished job frees a slot"""
+        manager = JobManager(max_workers=1, max_pending=2)
+        self.addCleanup(manager.shutdown)
+        release = threading.Event()
+        first = manager.submit(lambda progress: release.wait(5))
+        manager.submit(lambda progress: release.wait(5))
+        with self.assertRaises(JobQueueFull):
+            manager.submit(lambda progress: None)
+        release.set()
+        manager.wait_for_events(first, timeout=5)
+        for _ in range(100):
+            try:
+                manager.submit(lambda progress: None)
+                break
+            except JobQueueFull:
+                threading.Event().wait(0.01)
+        else:
+            self.fail("slot was not freed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from unittest import mock
+
+from src.incremental import IncrementalModel
+from src.model_store import ModelRegistry, load_model, save_model, train_model, update_model
+
+NOAA_CSV = """# Title: Global Land and Ocean Temperature Anomalies
+# Units: Degrees Celsius
+# Missing: -9999
+Year,Anomaly
+2000,0.40
+2001,0.52
+2002,-9999
+2003,0.61
+2004,0.55
+2005,0.68
+"""
+
+class TestModelStore(unittest.TestCase):
+    """Test suite for model persistence and the model registry"""
+    def setUp(self):
+        """A data dir with one file and a model dir of its own"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(os.path.join(self.data_dir, "temperature_anomaly"))
+        self.rel_path = os.path.join("temperature_anomaly", "tempGlobal.csv")
+        self.csv_path = os.path.join(self.data_dir, self.rel_path)
+        with open(self.csv_path, "w") as f:
+            f.write(NOAA_CSV)
+        self.model_dir = os.path.join(self.tmp_dir, "models")
+
+    def _registry(self):
+        """Registry without a catalog, targets come from the file names"""
+        return ModelRegistry(self.data_dir, model_dir=self.model_dir)
+
+    def test_save_load_round_trip(self):
+        """a loaded model predicts exactly like the trained one, in the units of the file"""
+        artifact = train_model(self.csv_path, "anomaly")
+        path = os.path.join(self.model_dir, "model.json")
+        save_model(artifact, path)
+        loaded = load_model(path)
+        years = np.array([[2001.0], [2010.0]])
+        np.testing.assert_allclose(loaded.predict(years), artifact.predict(years))
+        self.assertEqual(loaded.model.get_params(), artifact.model.get_params())
+        self.assertEqual(loaded.source["sha1"], artifact.source["sha1"])
+        # A trend fitted on the raw values lands in the range of the data
+        self.assertTrue(0.3 < artifact.predict([2003.0])[0] < 0.8)
+
+    def test_stale_after_source_change(self):
+        """touching keeps the model, changing the content makes it stale"""
+        artifact = train_model(self.csv_path, "anomaly")
+        os.utime(self.csv_path, ns=(0, 0))
+        self.assertFalse(artifact.is_stale())
+        with open(self.csv_path, "a") as f:
+            f.write("2006,0.90\n")
+        self.assertTrue(artifact.is_stale())
+
+    def test_registry_serves_without_training(self):
+        """after preload a lookup neither trains nor reads the disk model again"""
+        registry = self._registry()
+        self.assertEqual(registry.preload(), 1)
+        with mock.patch("src.model_store.update_model", side_effect=AssertionError("retrained")):
+            self.assertIsNotNone(registry.get(self.rel_path))
+            # A new registry (e.g. after a restart) loads the saved model
+            restarted = self._registry()
+            self.assertIsNotNone(restarted.get(self.rel_path))
+        self.assertEqual(restarted.stats(), {"models": 1, "trained": 0, "loaded": 1})
+
+    def test_registry_retrains_changed_source(self):
+        """a changed CSV gets a new model"""
+        registry = self._registry()
+        before = registry.get(self.rel_path)
+        with open(self.csv_path, "a") as f:
+            f.write("2006,3.00\n")
+        after = registry.get(self.rel_path)
+        self.assertIsNot(before, after)
+        self.assertEqual(registry.stats()["trained"], 2)
+        self.assertNotAlmostEqual(before.predict([2006.0])[0], after.predict([2006.0])[0])
+
+    def test_update_model_matches_full_training(self):
+        """the incremental path gives the model of train_model and an append is not re-read from the start"""
+        state_dir = os.path.join(self.tmp_dir, "state")
+        update_model(self.csv_path, "anomaly", state_dir)
+        with open(self.csv_path, "a") as f:
+            f.write("2006,0.90\n2007,0.71\n")
+        with mock.patch.object(IncrementalModel, "_reset", side_effect=AssertionError("full re-read")):
+            artifact = update_model(self.csv_path, "anomaly", state_dir)
+        full = train_model(self.csv_path, "anomaly")
+        years = np.array([[2001.0], [2030.0]])
+        np.testing.assert_allclose(artifact.predict(years), full.predict(years))
+        self.assertFalse(artifact.is_stale())
+
+    def test_registry_rejects_unknown_files(self):
+        """paths outside the data dir or without data have no model"""
+        registry = self._registry()
+        self.assertIsNone(registry.get("../secret.csv"))
+        self.assertIsNone(registry.get("temperature_anomaly/missing.csv"))
+
+    def test_registry_does_not_escape_data_dir(self):
+        """a real CSV reached through .. is refused and unknown names leave no lock behind"""
+        outside = os.path.join(self.tmp_dir, "elsewhere")
+        os.makedirs(outside)
+        shutil.copy(self.csv_path, os.path.join(outside, "tempLeak.csv"))
+        registry = self._registry()
+        self.assertIsNone(registry.get("../elsewhere/tempLeak.csv"))
+        self.assertIsNone(registry.get(os.path.join(outside, "tempLeak.csv")))
+        for i in range(20):
+            registry.get(f"temperature_anomaly/nope{i}.csv")
+        self.assertEqual(registry._locks, {})
+        self.assertFalse(os.path.isdir(self.model_dir))
+
+    def test_registry_only_serves_catalog_files(self):
+        """with a catalog only its files get a model"""
+        from src.catalog import DataCatalog
+        catalog = DataCatalog(self.data_dir, index_path=os.path.join(self.tmp_dir, "catalog.json"))
+        registry = ModelRegistry(self.data_dir, model_dir=self.model_dir, catalog=catalog)
+        self.assertIsNotNone(registry.get(self.rel_path))
+        self.assertIsNone(registry.get("../data/" + self.rel_path.replace(os.sep, "/") + "x"))
+        self.assertEqual(list(registry._locks), [self.rel_path])
+
+if __name__ == "__main__":
+    unittest.main()
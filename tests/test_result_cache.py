@@ -0,0 +1,40 @@
+import unittest
+import time
+
+import numpy as np
+
+from src.result_cache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+    """Test suite for the in-memory LRU/TTL result cache"""
+    def test_hits_and_misses(self):
+        """second lookup is a hit and the compute function runs once"""
+        cache = ResultCache()
+        calls = []
+        compute = lambda: calls.append(1) or "value"
+        self.assertEqual(cache.get_or_compute("k", compute), "value")
+        self.assertEqual(cache.get_or_compute("k", compute), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        """the least recently used array goes once the byte budget is exceeded"""
+        cache = ResultCache(max_bytes=2000)
+        cache.put("a", np.zeros(100))
+        cache.put("b", np.zeros(100))
+        cache.get("a")
+        cache.put("c", np.zeros(100))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertLessEqual(cache.stats()["bytes"], 2000)
+
+    def test_ttl_expiry(self):
+        """entries older than the ttl are misses"""
+        cache = ResultCache(ttl=0.01)
+        cache.put("k", b"png")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("sklearn", "matplotlib", "seaborn", "pandas") if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+# Runs the CLI with --help like python -m would and reports which heavy stacks got imported
+HELP_PROBE = """
+import json, runpy, sys
+sys.argv = ["src.cli", "--help"]
+try:
+    runpy.run_module("src.cli", run_name="__main__", alter_sys=True)
+except SystemExit:
+    pass
+heavy = [name for name in ("sklearn", "matplotlib", "seaborn", "pandas") if name in sys.modules]
+print(json.dumps({"heavy": heavy}), file=sys.stderr)
+"""
+
+def probe_import(module):
+    """Import a module in a fresh interpreter and report its time and which heavy stacks came with it"""
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+class TestStartup(unittest.TestCase):
+    """Import time regressions of the entry points"""
+    def test_cli_import_is_light(self):
+        """importing the CLI loads none of the plotting / ML / dataframe stacks"""
+        self.assertEqual(probe_import("src.cli")["heavy"], [])
+
+    def test_main_import_is_light(self):
+        """the interactive entry point is just as cheap to import"""
+        self.assertEqual(probe_import("src.main")["heavy"], [])
+
+    def test_algorithms_import_skips_sklearn(self):
+        """clustering / anomalies do not need scikit-learn"""
+        self.assertNotIn("sklearn", probe_import("src.algorithms")["heavy"])
+
+    def test_cli_help_skips_heavy_imports(self):
+        """--help prints the usage without ever importing the plotting / ML / dataframe stacks"""
+        result = subprocess.run([sys.executable, "-c", HELP_PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertIn("usage:", result.stdout)
+        self.assertEqual(json.loads(result.stderr.strip().splitlines()[-1])["heavy"], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from multiprocessing import shared_memory
+from unittest import mock
+
+from src.predictor import CustomTemperaturePredictor
+from src.tuning import _SharedDatasets, grid_search, grid_search_many, time_series_folds
+
+class TestTuning(unittest.TestCase):
+    """Test suite for the cross-validated parameter search"""
+    def setUp(self):
+        """A noisy linear trend over time"""
+        rng = np.random.default_rng(0)
+        self.X = np.linspace(-1.5, 1.5, 80).reshape(-1, 1)
+        self.y = 0.8 * self.X[:, 0] + rng.normal(scale=0.1, size=80)
+        self.grid = {"solver": ["gd"], "learning_rate": [0.1], "n_iterations": [1, 500]}
+
+    def test_folds_train_on_the_past(self):
+        """every fold tests right after its training window and the windows grow"""
+        folds = time_series_folds(60, n_splits=5)
+        self.assertEqual(len(folds), 5)
+        self.assertEqual(folds[-1][1], 60)
+        for (train_end, test_end), (next_train, _) in zip(folds, folds[1:]):
+            self.assertLess(train_end, test_end)
+            self.assertEqual(test_end, next_train)
+        with self.assertRaises(ValueError):
+            time_series_folds(2)
+
+    def test_best_params_and_timings(self):
+        """the converged candidate wins and every fold reports its time"""
+        result = grid_search(CustomTemperaturePredictor(), self.grid, self.X, self.y, n_splits=4, workers=1)
+        self.assertEqual(result["best_params"]["n_iterations"], 500)
+        self.assertEqual(len(result["results"]), 2)
+        for entry in result["results"]:
+            self.assertEqual(len(entry["fold_scores"]), 4)
+            self.assertTrue(all(seconds >= 0 for seconds in entry["fold_seconds"]))
+
+    def test_pool_matches_serial(self):
+        """the shared memory process pool scores exactly like the in-process run"""
+        datasets = {"a": (self.X, self.y), "b": (self.X[:40], -self.y[:40])}
+        serial = grid_search_many(CustomTemperaturePredictor(), self.grid, datasets, n_splits=3, workers=1)
+        pooled = grid_search_many(CustomTemperaturePredictor(), self.grid, datasets, n_splits=3, workers=2)
+        for name in datasets:
+            self.assertEqual(serial[name]["best_params"], pooled[name]["best_params"])
+            self.assertEqual([r["fold_scores"] for r in serial[name]["results"]],
+                             [r["fold_scores"] for r in pooled[name]["results"]])
+
+    def test_shared_block_is_removed(self):
+        """the shared memory block does not outlive the search"""
+        created = []
+        original_init = _SharedDatasets.__init__
+
+        def spy(self, datasets):
+            original_init(self, datasets)
+            created.append(self.shm.name)
+
+        with mock.patch.object(_SharedDatasets, "__init__", spy):
+            grid_search(CustomTemperaturePredictor(), self.grid, self.X, self.y, n_splits=2, workers=2)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=created[0])
+
+    def test_folds_do_not_see_the_future(self):
+        """raw years work, and rows after a fold leave its score untouched (scaling fitted per fold)"""
+        years = np.arange(1950, 2030, dtype=float).reshape(-1, 1)
+        y = 20 + 0.02 * (years[:, 0] - 1950) + np.random.default_rng(1).normal(scale=0.1, size=80)
+        changed = y.copy()
+        changed[-16:] += 50
+        base = grid_search(CustomTemperaturePredictor(), self.grid, years, y, n_splits=4, workers=1)
+        shifted = grid_search(CustomTemperaturePredictor(), self.grid, years, changed, n_splits=4, workers=1)
+        for before, after in zip(base["results"], shifted["results"]):
+            self.assertEqual(before["fold_scores"][:-1], after["fold_scores"][:-1])
+            self.assertNotEqual(before["fold_scores"][-1], after["fold_scores"][-1])
+        self.assertLess(base["best_score"], 0.1)
+
+    def test_nan_candidate_loses(self):
+        """data the model refuses to train on scores inf instead of crashing"""
+        y = self.y.copy()
+        y[5] = np.nan
+        result = grid_search(CustomTemperaturePredictor(), self.grid, self.X, y, n_splits=2, workers=1)
+        self.assertEqual(result["results"][0]["fold_scores"][0], float("inf"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,10 @@
 import unittest
+import io
+import os
+import tempfile
+import shutil
+
+from matplotlib.figure import Figure
 
 from src.visualizer import Visualizer
 
@@ -37,6 +43,66 @@ class TestVisualizer(unittest.TestCase):
         with self.assertRaises(ValueError):
             Visualizer.plot_anomalies([], [], show= False)
 
+    def test_headless_returns_figure(self):
+        """show=False without output hands back the Figure"""
+        fig = Visualizer.plot_trend([2000, 2001], [0.1, 0.2], [0.1, 0.3], show=False)
+        self.assertIsInstance(fig, Figure)
+
+    def test_export_to_buffer_as_svg(self):
+        """the plot can go straight into an in-memory buffer in svg"""
+        buffer = io.BytesIO()
+        Visualizer.plot_anomalies([0.2, 0.3, 2.5], [False, False, True], show=False, output=buffer, fmt="svg")
+        self.assertIn(b"<svg", buffer.getvalue())
+
+    def test_export_unknown_format(self):
+        """formats we do not support are rejected"""
+        with self.assertRaises(ValueError):
+            Visualizer.plot_clusters([(1, 2), (2, 3)], [0, 1], show=False, output=io.BytesIO(), fmt="bmp")
+
+    def test_export_many_in_parallel(self):
+        """bulk export writes every file, format taken from the extension"""
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir)
+        tasks = [
+            {"kind": "trend", "args": ([1, 2, 3], [0.1, 0.2, 0.3], [0.1, 0.2, 0.4]), "output": os.path.join(out_dir, "trend.png")},
+            {"kind": "clusters", "args": ([(1, 2), (2, 3)], [0, 1]), "output": os.path.join(out_dir, "clusters.svg")},
+            {"kind": "anomalies", "args": ([0.2, 0.3, 2.5], [False, False, True]), "output": os.path.join(out_dir, "anomalies.png")},
+        ]
+        written = Visualizer.export_many(tasks, workers=2)
+        self.assertEqual(written, [task["output"] for task in tasks])
+        with open(written[0], "rb") as f:
+            self.assertTrue(f.read().startswith(b"\x89PNG"))
+        with open(written[1], "rb") as f:
+            self.assertIn(b"<svg", f.read())
+
+    def test_anomaly_plot_is_downsampled(self):
+        """a long series draws at most the budget plus the flagged points"""
+        import numpy as np
+
+        ts = np.random.default_rng(0).normal(size=100000)
+        flags = np.abs(ts) > 3.5
+        fig = Visualizer.plot_anomalies(ts, flags, show=False, max_points=1000)
+        line, markers = fig.axes[0].get_lines()
+        self.assertLessEqual(len(line.get_xdata()), 1000 + flags.sum())
+        self.assertEqual(len(markers.get_xdata()), flags.sum())
+
+    def test_animation_exports_decimated_gif(self):
+        """a long series is thinned to max_frames and written as a gif without a window"""
+        from PIL import Image
+
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir)
+        path = os.path.join(out_dir, "compare.gif")
+        series = [float(i % 7) for i in range(500)]
+        Visualizer.animate_temperature_comparison(series, series[::-1], show=False, output=path, max_frames=5)
+        with Image.open(path) as gif:
+            self.assertLessEqual(gif.n_frames, 6)
+
+    def test_animation_rejects_unknown_format(self):
+        """only gif / mp4 writers are supported"""
+        with self.assertRaises(ValueError):
+            Visualizer.animate_temperature_comparison([1.0, 2.0], [1.0, 2.0], show=False, output="out.avi")
+
 if __name__ == '__main__':
     """this one runs all the tests"""
     unittest.main()
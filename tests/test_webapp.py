@@ -0,0 +1,139 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import matplotlib.pyplot as plt
+
+# Set before the app is imported: no background preload racing the tests, models, the
+# catalog index and parsed datasets written to a temp dir
+TMP_DIR = tempfile.mkdtemp()
+os.environ["ANALYZER_PRELOAD_MODELS"] = "0"
+os.environ["ANALYZER_MODEL_DIR"] = os.path.join(TMP_DIR, "models")
+os.environ["ANALYZER_CATALOG_INDEX"] = os.path.join(TMP_DIR, "catalog.json")
+os.environ["ANALYZER_CACHE_DIR"] = os.path.join(TMP_DIR, "datasets")
+
+from src.jobs import JobQueueFull
+from website.app import app, model_registry, run_analysis, result_cache
+
+def tearDownModule():
+    """Remove what the app wrote during the tests"""
+    shutil.rmtree(TMP_DIR, True)
+
+class TestWebApp(unittest.TestCase):
+    """Test suite for the Flask front end"""
+    def setUp(self):
+        """Flask test client"""
+        self.client = app.test_client()
+
+    def _wait_for_job(self, status_url):
+        """Poll a job until it is finished and return its JSON"""
+        for _ in range(200):
+            job = self.client.get(status_url).get_json()
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(0.05)
+        self.fail("job did not finish")
+
+    def test_job_returns_plot_from_memory(self):
+        """a job answers right away, then exposes its result and PNG, no pyplot figure is left open"""
+        open_before = len(plt.get_fignums())
+        response = self.client.post("/jobs", data={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": "anomalies"})
+        self.assertEqual(response.status_code, 202)
+        job = self._wait_for_job(response.get_json()["status_url"])
+        self.assertEqual(job["status"], "done")
+        self.assertIn("Loading data", job["progress"])
+        plot = self.client.get(job["plot_url"])
+        self.assertEqual(plot.mimetype, "image/png")
+        self.assertTrue(plot.data.startswith(b"\x89PNG"))
+        self.assertEqual(len(plt.get_fignums()), open_before)
+
+    def test_metrics_report_stage_latencies(self):
+        """/metrics exposes request counters and per stage latency histograms"""
+        run_analysis("precipitation/precipAsiaNOAA.csv", "anomalies")
+        self.client.get("/cache/stats")
+        body = self.client.get("/metrics").get_json()
+        self.assertGreaterEqual(body["counters"]["http.requests.cache_stats.200"], 1)
+        stage = body["latency"]["stage.detect_anomalies"]
+        self.assertGreaterEqual(stage["count"], 1)
+        self.assertEqual(stage["buckets"]["+Inf"], stage["count"])
+        self.assertIn("result_cache", body)
+
+    def test_unknown_action_not_a_metric(self):
+        """unknown actions share the analysis.unknown counter instead of getting their own"""
+        run_analysis("precipitation/precipAsiaNOAA.csv", "../../etc")
+        counters = self.client.get("/metrics").get_json()["counters"]
+        self.assertGreaterEqual(counters["analysis.unknown"], 1)
+        self.assertFalse([name for name in counters if "etc" in name])
+
+    def test_predict_served_from_registry(self):
+        """/predict answers from the registry in the units of the file, the model is saved to the temp dir"""
+        response = self.client.get("/predict", query_string={"file": "temperature_anomaly/tempAsiaNOAA.csv", "year": 2030})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["target_column"], "temperature")
+        self.assertIsInstance(body["prediction"], float)
+        self.assertTrue(os.listdir(model_registry.model_dir))
+        self.assertTrue(model_registry.model_dir.startswith(TMP_DIR))
+        self.assertEqual(self.client.get("/predict", query_string={"file": "nope.csv", "year": 2030}).status_code, 404)
+        self.assertEqual(self.client.get("/predict", query_string={"file": "temperature_anomaly/tempAsiaNOAA.csv"}).status_code, 400)
+
+    def test_index_post_starts_job(self):
+        """the form post renders the page with the job to poll instead of blocking"""
+        response = self.client.post("/", data={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": "cluster"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"data-status-url=\"/jobs/", response.data)
+
+    def test_job_events_stream(self):
+        """the event stream sends progress and finishes with the done event"""
+        response = self.client.post("/jobs", json={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": "predict"})
+        events = self.client.get(f"/jobs/{response.get_json()['id']}/events").get_data(as_text=True)
+        self.assertIn("event: progress", events)
+        self.assertIn("event: done", events)
+
+    def test_unknown_action_rejected(self):
+        """made up actions are a 400 and never become a job"""
+        with mock.patch("website.app.submit_analysis") as submit:
+            for action in ("x1", "../../etc"):
+                response = self.client.post("/jobs", data={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": action})
+                self.assertEqual(response.status_code, 400)
+            response = self.client.post("/", data={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": "x2"})
+            self.assertEqual(response.status_code, 400)
+        submit.assert_not_called()
+
+    def test_full_queue_is_503(self):
+        """a full job queue answers 503 instead of queueing more"""
+        with mock.patch("website.app.submit_analysis", side_effect=JobQueueFull("full")):
+            response = self.client.post("/jobs", data={"selected_file": "precipitation/precipAsiaNOAA.csv", "action": "predict"})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_unknown_job(self):
+        """unknown ids are 404"""
+        self.assertEqual(self.client.get("/jobs/nope").status_code, 404)
+
+    def test_concurrent_requests_get_their_own_plot(self):
+        """parallel analyses of different actions each render a valid PNG"""
+        jobs = [("precipitation/precipAsiaNOAA.csv", action) for action in ("predict", "cluster", "anomalies")] * 3
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda job: run_analysis(*job), jobs))
+        for _, png in results:
+            self.assertTrue(png.startswith(b"\x89PNG"))
+
+    def test_repeat_request_hits_cache(self):
+        """the same file and action twice is served from the result cache"""
+        result_cache.clear()
+        form = {"selected_file": "temperature_anomaly/tempAsiaNOAA.csv", "action": "predict"}
+        first = self._wait_for_job(self.client.post("/jobs", data=form).get_json()["status_url"])
+        hits = result_cache.stats()["hits"]
+        second = self._wait_for_job(self.client.post("/jobs", data=form).get_json()["status_url"])
+        self.assertEqual(result_cache.stats()["hits"], hits + 1)
+        self.assertEqual(first["result"], second["result"])
+        self.assertEqual(self.client.get("/cache/stats").get_json()["entries"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
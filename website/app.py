@@ -1,12 +1,21 @@
+import json
 import sys
 import os
+import threading
+import time
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # no GUI backend on the server, figures only ever render to buffers
 
-from flask import Flask, render_template, request
+from flask import Flask, Response, abort, g, jsonify, render_template, request, stream_with_context, url_for
+from src.cache import DEFAULT_CACHE_DIR, DatasetCache
+from src.catalog import DataCatalog
+from src.instrumentation import MetricsRegistry, Profiler
+from src.jobs import DONE as JOB_DONE, JobManager, JobQueueFull
+from src.model_store import ModelRegistry
+from src.result_cache import ResultCache
 from src.data_processor import DataProcessor
-from src.algorithms import CustomTemperaturePredictor, custom_clustering, detect_anomalies
+from src.algorithms import DEFAULT_N_INIT, custom_clustering, detect_anomalies
 from src.visualizer import Visualizer
 
 
@@ -19,110 +28,258 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
 
+# Parsed datasets are kept on disk so repeat requests skip the CSV parse, ANALYZER_CACHE_DIR moves them
+dataset_cache = DatasetCache(os.environ.get("ANALYZER_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+# What run_analysis can do, anything else is refused before a job is queued
+ANALYSIS_ACTIONS = ("predict", "cluster", "anomalies")
+
+# Algorithm settings used by every analysis, part of the result cache key
+ANALYSIS_PARAMS = {"n_clusters": 3, "n_init": DEFAULT_N_INIT, "window_size": 3, "threshold": 1.5}
+
+# Finished results (message + PNG) keyed on file identity, mtime, action and params
+result_cache = ResultCache(max_entries=256, max_bytes=64 * 1024 * 1024, ttl=24 * 3600)
+
+# Analyses run here instead of in the request thread
+job_manager = JobManager(max_workers=int(os.environ.get("ANALYZER_WORKERS", 2)))
+
+# Index of data/ with the detected target column of every file, refreshed incrementally
+data_catalog = DataCatalog(DATA_DIR)
+
+# Trained models of every data file, predict requests only look them up
+model_registry = ModelRegistry(DATA_DIR, catalog=data_catalog)
+if os.environ.get("ANALYZER_PRELOAD_MODELS", "1") != "0":
+    # Load (or train once) every region model at start without holding up the first request
+    threading.Thread(target=model_registry.preload, name="model-preload", daemon=True).start()
+
+# Cumulative counters and latency histograms served on /metrics
+metrics = MetricsRegistry()
+
 def list_data_files():
-    """ scan the DATA_DIR and return a sorted list of all CSV file paths """
-    options = []
-    for root, _, files in os.walk(DATA_DIR):
-        for file in files:
-            if file.endswith(".csv"):
-                # Get a relative path so not to expose full system path
-                rel_path = os.path.relpath(os.path.join(root, file), DATA_DIR)
-                options.append(rel_path)
-    return sorted(options)
-
-def auto_detect_target_column(filename, df):
-    """  Guesses the target column name based on the filename or the DF header  """
-    lower_name = filename.lower()
-
-    if "temp" in lower_name:
-        return "temperature"
-    elif "precip" in lower_name:
-        return "precipitation"
-    elif "anom" in lower_name:
-        return "anomaly"
-
-   
-   #checking the column names in the CSV
-    for col in df.columns:
-        if col in ["temperature", "precipitation", "anomaly"]:
-            return col
-        if "temp" in col.lower():
-            return col
-        if "precip" in col.lower():
-            return col
-        if "anom" in col.lower():
-            return col
-
-    return None
+    """ sorted list of all CSV file paths in DATA_DIR, a catalog lookup rather than a scan """
+    return data_catalog.files()
+
+def _no_progress(message):
+    """ Default progress callback that drops the message """
+
+def run_analysis(selected_file, action, progress=_no_progress):
+    """ Runs one action on one data file and returns (result message, PNG bytes or None) """
+    # Every stage below lands in the stage.* latency histograms of /metrics
+    profiler = Profiler(registry=metrics)
+    if action not in ANALYSIS_ACTIONS:
+        # One bucket for all of them, request input never becomes a metric name
+        metrics.increment("analysis.unknown")
+        return f" Unknown action '{action}'.", None
+    metrics.increment(f"analysis.{action}")
+    filepath = os.path.join(DATA_DIR, selected_file)
+    progress("Loading data")
+    with profiler.span("detect_target"):
+        target_column = data_catalog.target_column(selected_file)
+
+    if not target_column:
+        return " Could not detect target column. Please rename your file or column to include 'temp', 'precip', or 'anom'.", None
+
+    processor = DataProcessor(filepath, target_column, cache=dataset_cache)
+    with profiler.span("load_data"):
+        df = processor.load_data()
+    with profiler.span("clean_data"):
+        df = processor.clean_data()
+    with profiler.span("normalize_temperature"):
+        df = processor.normalize_temperature()
+    with profiler.span("get_features_and_target"):
+        X, y = processor.get_features_and_target()
+
+    if X.size == 0 or y.size == 0:
+        return " Not enough data to process.", None
+
+    with profiler.span("standardize"):
+        X_mean = X.mean(axis=0)
+        X_std = X.std(axis=0)
+        X = (X - X_mean) / X_std
+    progress(f"Running {action}")
+
+    # Every request draws on its own Figure so concurrent users never share pyplot state
+    if action == "predict":
+        # The registry trained the model already (again only if the file changed)
+        with profiler.span("model_lookup"):
+            artifact = model_registry.get(selected_file)
+
+        if artifact is None:
+            return " Prediction skipped, training failed due to missing or invalid data", None
+        with profiler.span("predict"):
+            predictions = artifact.model.predict(X)
+        # Plot the trend of actual vs predicted values
+        progress("Rendering plot")
+        with profiler.span("render"):
+            png = Visualizer.figure_to_png(Visualizer.trend_figure(range(len(y)), y, predictions))
+        return f" Prediction complete here are the first 5 predictions: {predictions[:5]}", png
+
+    elif action == "cluster":
+        with profiler.span("custom_clustering"):
+            # Already on a job pool thread, so the restarts stay serial (n_jobs=1)
+            labels, _, inertia, _ = custom_clustering(X, n_clusters=ANALYSIS_PARAMS["n_clusters"],
+                                                      n_init=ANALYSIS_PARAMS["n_init"], full_output=True)
+        progress("Rendering plot")
+        with profiler.span("render"):
+            png = Visualizer.figure_to_png(Visualizer.clusters_figure(list(X), labels))
+        return f" Clustering complete (inertia {inertia:.3f}), sample labels: {labels[:5]}", png
+
+    elif action == "anomalies":
+        with profiler.span("detect_anomalies"):
+            anomalies = detect_anomalies(y, window_size=ANALYSIS_PARAMS["window_size"], threshold=ANALYSIS_PARAMS["threshold"])
+        progress("Rendering plot")
+        with profiler.span("render"):
+            png = Visualizer.figure_to_png(Visualizer.anomalies_figure(y.tolist(), anomalies.tolist()))
+        return " Anomaly detection complete.", png
+
+def cached_analysis(selected_file, action, progress=_no_progress):
+    """ run_analysis behind the result cache, a changed data file gets a new key through its mtime/size """
+    filepath = os.path.join(DATA_DIR, selected_file)
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return run_analysis(selected_file, action, progress)
+    key = (selected_file, stat.st_mtime_ns, stat.st_size, action, tuple(sorted(ANALYSIS_PARAMS.items())))
+    return result_cache.get_or_compute(key, lambda: run_analysis(selected_file, action, progress))
+
+def submit_analysis(selected_file, action):
+    """ Queues an analysis on the background pool and returns the job id """
+    metrics.increment("jobs.submitted")
+    return job_manager.submit(cached_analysis, selected_file, action, description=f"{action} on {selected_file}")
+
+def _job_status(job):
+    """ JSON body for a job, the result message and plot URL once it is done """
+    body = job.to_dict()
+    body["status_url"] = url_for("job_status", job_id=job.id)
+    if job.status == JOB_DONE:
+        message, png = job.result
+        body["result"] = message
+        body["plot_url"] = url_for("job_plot", job_id=job.id) if png is not None else None
+    return body
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """ Starts an analysis in the background and answers right away with its id """
+    data = request.get_json(silent=True) or request.form
+    selected_file = data.get("selected_file")
+    action = data.get("action")
+    if not selected_file or not action:
+        return jsonify({"error": "selected_file and action are required"}), 400
+    if action not in ANALYSIS_ACTIONS:
+        return jsonify({"error": f"action must be one of {', '.join(ANALYSIS_ACTIONS)}"}), 400
+    try:
+        job_id = submit_analysis(selected_file, action)
+    except JobQueueFull:
+        return jsonify({"error": "too many analyses are waiting, try again shortly"}), 503, {"Retry-After": "5"}
+    return jsonify(_job_status(job_manager.get(job_id))), 202
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """ Polling endpoint with the status / progress / result of a job """
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(_job_status(job))
+
+@app.route("/jobs/<job_id>/plot.png")
+def job_plot(job_id):
+    """ The rendered plot of a finished job straight from memory """
+    job = job_manager.get(job_id)
+    if job is None or job.status != JOB_DONE or job.result[1] is None:
+        abort(404)
+    return Response(job.result[1], mimetype="image/png")
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """ Server-Sent Events stream of progress messages, ends with the final status """
+    if job_manager.get(job_id) is None:
+        abort(404)
+
+    def stream():
+        seen = 0
+        while True:
+            events, finished = job_manager.wait_for_events(job_id, since=seen)
+            for event in events:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            seen += len(events)
+            if finished:
+                job = job_manager.get(job_id)
+                status = _job_status(job) if job is not None else {"id": job_id, "status": "unknown"}
+                yield f"event: done\ndata: {json.dumps(status)}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.before_request
+def _start_timer():
+    """ Remember when the request started for the latency histogram """
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    """ Count every request and record its latency per endpoint """
+    endpoint = request.endpoint or "unknown"
+    metrics.increment(f"http.requests.{endpoint}.{response.status_code}")
+    if "request_start" in g:
+        metrics.observe(f"http.{endpoint}", time.perf_counter() - g.request_start)
+    return response
+
+@app.route("/metrics")
+def metrics_view():
+    """ Cumulative counters, latency histograms and result cache stats as JSON """
+    snapshot = metrics.snapshot()
+    snapshot["result_cache"] = result_cache.stats()
+    return jsonify(snapshot)
+
+@app.route("/predict")
+def predict_view():
+    """ Serve a prediction from the preloaded model: /predict?file=<rel path>&year=2030[&month=1] """
+    selected_file = request.args.get("file", "")
+    artifact = model_registry.get(selected_file)
+    if artifact is None:
+        return jsonify({"error": f"no model for '{selected_file}'"}), 404
+    try:
+        features = [float(request.args["year"])]
+        if len(artifact.normalization["feature_mean"]) == 2:
+            features.append(float(request.args["month"]))
+    except (KeyError, ValueError):
+        return jsonify({"error": "year (and month for monthly data) must be numbers"}), 400
+    prediction = float(artifact.predict(features)[0])
+    return jsonify({"file": selected_file, "target_column": artifact.target_column,
+                    "features": features, "prediction": prediction})
+
+@app.route("/models/stats")
+def model_stats():
+    """ How many models the registry holds, trained and loaded from disk """
+    return jsonify(model_registry.stats())
+
+@app.route("/cache/stats")
+def cache_stats():
+    """ Hit / miss counters and size of the result cache """
+    return jsonify(result_cache.stats())
 
 @app.route("/", methods=["GET", "POST"])
 def index():
     """ Both GET and POST requests and displays available data files runs what user tells it to   """
-    result = None  
-    plot_created = False  
+    job_id = None  
     file_options = list_data_files()  
 
     if request.method == "POST":
         selected_file = request.form.get("selected_file")
         action = request.form.get("action")
 
-
+        if action and action not in ANALYSIS_ACTIONS:
+            return render_template("index.html", job_id=None, files=file_options), 400
         if selected_file and action:
-            filepath = os.path.join(DATA_DIR, selected_file)
-           # help auto-detect columns
-            df_preview = pd.read_csv(filepath, comment="#", engine="python")
-            target_column = auto_detect_target_column(selected_file, df_preview)
-
-            if not target_column:
-                result = " Could not detect target column. Please rename your file or column to include 'temp', 'precip', or 'anom'."
-                return render_template("index.html", result=result, plot=plot_created, files=file_options)
-
-            processor = DataProcessor(filepath, target_column)
-            df = processor.load_data()
-            df = processor.clean_data()
-            df = processor.normalize_temperature()
-            X, y = processor.get_features_and_target()
-
-            
-            if X.size == 0 or y.size == 0:
-                result = " Not enough data to process."
-            else:
-                X_mean = X.mean(axis=0)
-                X_std = X.std(axis=0)
-                X = (X - X_mean) / X_std
-
-                if action == "predict":
-                    # Create / train our temperature prediction model
-                    model = CustomTemperaturePredictor()
-                    model.fit(X, y)
-
-                    if model.weights is None:
-                        result = " Prediction skipped, training failed due to missing or invalid data"
-                    else:
-                        predictions = model.predict(X)
-                        # Plot the trend of actual vs predicted values
-                        Visualizer.plot_trend(range(len(y)), y, predictions)
-                        # Save the generated plot to the static folder to displkay
-                        plt.savefig("web/static/plot.png")
-                        plot_created = True
-                        result = f" Prediction complete here are the first 5 predictions: {predictions[:5]}"
-
-                elif action == "cluster":
-                    labels = custom_clustering(X, n_clusters=3)
-                    Visualizer.plot_clusters(list(X), labels)
-                    plt.savefig("web/static/plot.png")
-                    plot_created = True
-                    result = f" Clustering complete, sample labels: {labels[:5]}"
-
-                elif action == "anomalies":
-                    anomalies = detect_anomalies(y, window_size=3, threshold=1.5)
-                    Visualizer.plot_anomalies(y.tolist(), anomalies.tolist())
-                    plt.savefig("web/static/plot.png")
-                    plot_created = True
-                    result = " Anomaly detection complete."
-
-
-    return render_template("index.html", result=result, plot=plot_created, files=file_options)
+            # The analysis runs in the background, the page polls the job for its result
+            try:
+                job_id = submit_analysis(selected_file, action)
+            except JobQueueFull:
+                return render_template("index.html", job_id=None, files=file_options), 503, {"Retry-After": "5"}
+
+    return render_template("index.html", job_id=job_id, files=file_options)
 
 if __name__ == "__main__":
     """ Runs the Flask app in debug mode and off if in production"""